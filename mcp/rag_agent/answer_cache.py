@@ -0,0 +1,108 @@
+# answer_cache.py
+
+import re
+import threading
+import time
+
+import numpy as np
+
+# Figures, years and periods ("2023", "1,250.5", "FY2022", "Q3") that can flip the answer
+# to an otherwise near-identical question
+NUMERIC_TERM_PATTERN = re.compile(r"\b(?:fy)?(\d+(?:[.,]\d+)*)\b|\b([qh][1-4])\b", re.IGNORECASE)
+
+
+def numeric_terms(text):
+    """The normalised numbers and periods in `text`: "1,250.50" -> "1250.5", "FY2022" -> "2022", "Q3" -> "q3"."""
+    terms = set()
+    for number, period in NUMERIC_TERM_PATTERN.findall(text):
+        if period:
+            terms.add(period.lower())
+            continue
+        number = number.replace(",", "")
+        if "." in number:
+            number = number.rstrip("0").rstrip(".")
+        terms.add(number)
+    return frozenset(terms)
+
+
+class SemanticAnswerCache:
+    """
+    In-process cache of answers keyed by the question's embedding.
+
+    A lookup hits when a stored question has cosine similarity >= `threshold`,
+    the same source filter, the same corpus version, exactly the same
+    `numeric_terms` and is younger than `ttl_seconds`. Questions that differ
+    only in a year or figure embed almost identically, so similarity alone
+    would serve the answer for the wrong period. At most `max_entries`
+    answers are kept (oldest evicted).
+    """
+
+    def __init__(self, threshold=0.95, ttl_seconds=3600, max_entries=1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = []  # [(created_at, filter_key, corpus_version, terms, value)]
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, now, corpus_version):
+        keep = [
+            i for i, (created_at, _, version, _, _) in enumerate(self._entries)
+            if version == corpus_version and now - created_at < self.ttl_seconds
+        ]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep] if keep else np.empty((0, 0), dtype=np.float32)
+
+    def lookup(self, query_vector, filter_key, corpus_version, terms=frozenset()):
+        """Return (value, similarity) of the best matching entry, or (None, 0.0)."""
+        query = self._unit(query_vector)
+        terms = frozenset(terms)
+        with self._lock:
+            self._expire(time.time(), corpus_version)
+            if self._entries:
+                similarities = self._vectors @ query
+                for i in np.argsort(-similarities):
+                    if similarities[i] < self.threshold:
+                        break
+                    _, entry_filter, _, entry_terms, value = self._entries[i]
+                    if entry_filter == filter_key and entry_terms == terms:
+                        self.hits += 1
+                        return value, float(similarities[i])
+            self.misses += 1
+            return None, 0.0
+
+    def store(self, query_vector, filter_key, corpus_version, value, terms=frozenset()):
+        query = self._unit(query_vector)
+        with self._lock:
+            self._expire(time.time(), corpus_version)
+            self._entries.append((time.time(), filter_key, corpus_version, frozenset(terms), value))
+            if self._vectors.size:
+                self._vectors = np.vstack([self._vectors, query])
+            else:
+                self._vectors = query[np.newaxis, :]
+            if len(self._entries) > self.max_entries:
+                self._entries = self._entries[-self.max_entries:]
+                self._vectors = self._vectors[-self.max_entries:]
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
@@ -1,4 +1,22 @@
-from rag_agent import get_qa_chain, list_pdf_files_from_vector_store
+from rag_agent import answer_question, detect_source_filter, format_timings, list_pdf_files_from_vector_store
+
+
+def print_sources(source_docs):
+    # 📄 Show deduplicated sources with 1-based page numbers
+    if source_docs:
+        unique_sources = {
+            f"- File: {doc.metadata.get('source', 'Unknown')}, Page: {int(doc.metadata.get('page', 0)) + 1}"
+            for doc in source_docs
+        }
+        print("\n📄 Sources:")
+        for source in sorted(unique_sources):
+            print(source)
+    print("\nA: ", end="", flush=True)
+
+
+def print_token(text):
+    print(text, end="", flush=True)
+
 
 def main():
     file_info = list_pdf_files_from_vector_store()
@@ -16,30 +34,18 @@ def main():
             break
 
         # Optional: detect which file the question targets
-        filter_file = None
-        for fname in file_info:
-            if fname.lower() in question.lower():
-                filter_file = fname
-                break
-
-        # Get the appropriate Retrieval QA chain
-        qa_chain = get_qa_chain(filter_by_source=filter_file)
-
-        # Ask the question
-        result = qa_chain.invoke({"question": question})
-
-        print(f"\nA: {result.get('answer', '').strip()}\n")
-
-        # 📄 Show deduplicated sources with 1-based page numbers
-        source_docs = result.get("source_documents", [])
-        if source_docs:
-            unique_sources = {
-                f"- File: {doc.metadata.get('source', 'Unknown')}, Page: {int(doc.metadata.get('page', 0)) + 1}"
-                for doc in source_docs
-            }
-            print("📄 Sources:")
-            for source in sorted(unique_sources):
-                print(source)
+        filter_file = detect_source_filter(question, file_info)
+
+        # Ask the question (the QA chain for this filter is cached across questions).
+        # Sources are printed as soon as retrieval finishes, then the answer streams in.
+        result = answer_question(
+            question,
+            filter_by_source=filter_file,
+            on_sources=print_sources,
+            on_token=print_token,
+        )
+
+        print(f"\n\n⏱️ {format_timings(result['timings'])}\n")
 
 if __name__ == "__main__":
     main()
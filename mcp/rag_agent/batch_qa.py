@@ -0,0 +1,300 @@
+# batch_qa.py
+#
+# Answer a list or CSV of questions in one run:
+#   python batch_qa.py questions.csv -o answers.jsonl
+#
+# All questions are embedded in one batched request, retrieval runs in a
+# thread pool, and LLM calls are dispatched with bounded parallelism.
+# Results are written (and flushed) one by one as they complete.
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from rag_agent import (
+    agenerate_answer,
+    detect_source_filter,
+    export_metrics,
+    get_answer_chain,
+    get_embedding_model,
+    list_pdf_files_from_vector_store,
+    retrieve_by_vector,
+)
+from metrics import metrics
+
+# LLM calls in flight, retrieval threads, and per-question generation timeout (0 = none)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_RETRIEVAL_WORKERS = int(os.getenv("BATCH_RETRIEVAL_WORKERS", "8"))
+BATCH_TIMEOUT_SECONDS = float(os.getenv("BATCH_TIMEOUT_SECONDS", "120"))
+# Where the MCP tool may write result files
+BATCH_OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", "./batch_results")
+
+RESULT_FIELDS = ("id", "question", "source_filter", "answer", "sources",
+                 "retrieve_s", "generate_s", "latency_s", "error")
+
+
+# === Questions in ===
+def _column(fieldnames, *names):
+    by_lower = {name.strip().lower(): name for name in fieldnames}
+    for name in names:
+        if name in by_lower:
+            return by_lower[name]
+    return None
+
+
+def parse_questions(text, fmt="text", first_id=1):
+    """
+    Questions as [{"id", "question", "source"}] from CSV, JSON or plain text.
+
+    CSV uses the 'question' column (or the first one) and optional 'id' and
+    'source'/'file' columns. JSON is a list of strings or of objects with the
+    same keys. Plain text is one question per line. Questions without an id
+    are numbered from `first_id`; `source` is None where not given.
+    """
+    items = []
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        fieldnames = reader.fieldnames or []
+        question_col = _column(fieldnames, "question", "query") or (fieldnames[0] if fieldnames else None)
+        id_col = _column(fieldnames, "id")
+        source_col = _column(fieldnames, "source", "file")
+        for row in reader:
+            items.append({
+                "id": row.get(id_col) if id_col else None,
+                "question": row.get(question_col) or "",
+                "source": row.get(source_col) if source_col else None,
+            })
+    elif fmt == "json":
+        for entry in json.loads(text):
+            if isinstance(entry, str):
+                entry = {"question": entry}
+            items.append({"id": entry.get("id"), "question": entry.get("question", ""), "source": entry.get("source")})
+    else:
+        items = [{"id": None, "question": line, "source": None} for line in text.splitlines()]
+
+    questions = []
+    for number, item in enumerate(items, start=first_id):
+        question = (item["question"] or "").strip()
+        if not question or (fmt == "text" and question.startswith("#")):
+            continue
+        questions.append({
+            "id": str(item["id"]).strip() if item["id"] not in (None, "") else str(number),
+            "question": question,
+            "source": (item["source"] or "").strip() or None,
+        })
+    return questions
+
+
+def read_questions(path):
+    """Questions from a .csv, .json or text file (see `parse_questions`)."""
+    ext = os.path.splitext(path)[1].lower()
+    fmt = {".csv": "csv", ".json": "json"}.get(ext, "text")
+    with open(path, encoding="utf-8-sig", newline="") as fh:
+        return parse_questions(fh.read(), fmt)
+
+
+def assign_source_filters(questions, file_names):
+    """Give questions without a source the file they mention by name, as ask.py does."""
+    for item in questions:
+        if item["source"] is None:
+            item["source"] = detect_source_filter(item["question"], file_names)
+    return questions
+
+
+# === Results out ===
+def _source_list(docs):
+    """Distinct (file, page) pairs in retrieval order; pages are stored 1-based by pdf_loader."""
+    seen = {}
+    for doc in docs:
+        source = doc.metadata.get("source", "Unknown")
+        try:
+            page = int(doc.metadata["page"])
+        except (KeyError, TypeError, ValueError):
+            page = None
+        seen.setdefault((source, page), None)
+    return [{"source": source, "page": page} for source, page in seen]
+
+
+class ResultWriter:
+    """Writes result dicts to `fh` as JSONL or CSV, flushing after every row."""
+
+    def __init__(self, fh, fmt="jsonl"):
+        self.fh = fh
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(fh, fieldnames=RESULT_FIELDS)
+            self._csv.writeheader()
+
+    @classmethod
+    def format_for(cls, path):
+        return "csv" if str(path).lower().endswith(".csv") else "jsonl"
+
+    def write(self, result):
+        if self._csv is not None:
+            row = dict(result)
+            row["sources"] = "; ".join(
+                f"{s['source']} p.{s['page']}" if s["page"] else s["source"] for s in result["sources"]
+            )
+            self._csv.writerow({field: row.get(field, "") for field in RESULT_FIELDS})
+        else:
+            self.fh.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.fh.flush()
+
+
+def resolve_output_path(path, output_dir=BATCH_OUTPUT_DIR):
+    """`path` (relative to `output_dir`) as a .jsonl or .csv file, refused if it leaves `output_dir`."""
+    root = Path(output_dir).expanduser().resolve()
+    candidate = Path(path).expanduser()
+    resolved = (candidate if candidate.is_absolute() else root / candidate).resolve()
+    if not resolved.is_relative_to(root):
+        raise ValueError(f"'{path}' is outside the output directory {root}")
+    if resolved.suffix.lower() not in (".jsonl", ".csv"):
+        raise ValueError(f"Unsupported output type '{resolved.suffix}'; expected .jsonl or .csv")
+    resolved.parent.mkdir(parents=True, exist_ok=True)
+    return resolved
+
+
+def summarize(results, elapsed):
+    latencies = sorted(r["latency_s"] for r in results if not r["error"])
+
+    def nearest_rank(q):
+        return latencies[max(math.ceil(q * len(latencies)) - 1, 0)] if latencies else 0.0
+
+    return {
+        "questions": len(results),
+        "failed": sum(1 for r in results if r["error"]),
+        "elapsed_s": round(elapsed, 3),
+        "p50_s": round(nearest_rank(0.5), 3),
+        "p95_s": round(nearest_rank(0.95), 3),
+    }
+
+
+# === Batch pipeline ===
+async def _answer_one(item, query_vector, pool, llm_slots, timeout):
+    loop = asyncio.get_running_loop()
+    result = {
+        "id": item["id"],
+        "question": item["question"],
+        "source_filter": item["source"],
+        "answer": "",
+        "sources": [],
+        "retrieve_s": 0.0,
+        "generate_s": 0.0,
+        "latency_s": 0.0,
+        "error": "",
+    }
+    start = time.perf_counter()
+    try:
+        docs = await loop.run_in_executor(pool, retrieve_by_vector, item["question"], query_vector, item["source"])
+        result["retrieve_s"] = round(time.perf_counter() - start, 3)
+        async with llm_slots:
+            generate_start = time.perf_counter()
+            answer = await asyncio.wait_for(agenerate_answer(item["question"], docs), timeout or None)
+            result["generate_s"] = round(time.perf_counter() - generate_start, 3)
+        result["answer"] = answer["answer"].strip()
+        result["sources"] = _source_list(answer.get("source_documents", docs))
+        metrics.observe("rag_stage_seconds", result["retrieve_s"], stage="retrieve")
+        metrics.observe("rag_stage_seconds", result["generate_s"], stage="generate")
+    except asyncio.TimeoutError:
+        result["error"] = f"timed out after {timeout:.0f}s"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency_s"] = round(time.perf_counter() - start, 3)
+    metrics.inc("rag_batch_questions_total", status="error" if result["error"] else "ok")
+    if not result["error"]:
+        metrics.observe("rag_query_seconds", result["latency_s"], cached="false")
+    return result
+
+
+async def abatch_answer(questions, max_concurrency=BATCH_MAX_CONCURRENCY, retrieval_workers=BATCH_RETRIEVAL_WORKERS,
+                        timeout=BATCH_TIMEOUT_SECONDS, llm_slots=None):
+    """
+    Answer `questions` (see `parse_questions`), yielding one result dict per
+    question in completion order.
+
+    The questions are embedded in one `embed_documents` call; retrieval
+    then runs on `retrieval_workers` threads while at most `max_concurrency`
+    LLM calls are in flight (or as many as the shared `llm_slots` semaphore
+    allows). `latency_s` runs from the start of retrieval to the answer, so
+    it includes waiting for an LLM slot. Failed questions carry `error`.
+    """
+    if not questions:
+        return
+    with metrics.span("query_embed"):
+        vectors = await asyncio.to_thread(get_embedding_model().embed_documents, [q["question"] for q in questions])
+    await asyncio.to_thread(get_answer_chain)
+    llm_slots = llm_slots or asyncio.Semaphore(max_concurrency)
+
+    pool = ThreadPoolExecutor(max_workers=retrieval_workers, thread_name_prefix="rag-batch-retrieve")
+    tasks = [
+        asyncio.create_task(_answer_one(item, vector, pool, llm_slots, timeout))
+        for item, vector in zip(questions, vectors)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+        export_metrics(force=True)
+
+
+async def run_batch(questions, writer, on_result=None, **kwargs):
+    """Stream the answers for `questions` into `writer`; returns the summary dict."""
+    start = time.perf_counter()
+    results = []
+    async for result in abatch_answer(questions, **kwargs):
+        writer.write(result)
+        results.append(result)
+        if on_result:
+            await on_result(result, len(results))
+    return summarize(results, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a list or CSV of questions against the ingested reports.")
+    parser.add_argument("questions", help="a .csv ('question' column, optional 'id'/'source'), .json or text file")
+    parser.add_argument("-o", "--output", default="batch_answers.jsonl", help="results file, .jsonl or .csv")
+    parser.add_argument("--concurrency", type=int, default=BATCH_MAX_CONCURRENCY, help="LLM calls in flight")
+    parser.add_argument("--retrieval-workers", type=int, default=BATCH_RETRIEVAL_WORKERS)
+    parser.add_argument("--timeout", type=float, default=BATCH_TIMEOUT_SECONDS,
+                        help="seconds allowed per answer (0 = no limit)")
+    parser.add_argument("--no-detect-source", action="store_true",
+                        help="do not restrict questions that name a file to that file")
+    args = parser.parse_args(argv)
+
+    questions = read_questions(args.questions)
+    if not args.no_detect_source:
+        assign_source_filters(questions, list_pdf_files_from_vector_store())
+    print(f"📋 {len(questions)} questions from '{args.questions}'")
+
+    async def report(result, done):
+        status = f"❌ {result['error']}" if result["error"] else f"{result['latency_s']:.2f}s"
+        print(f"  [{done}/{len(questions)}] {result['id']}: {status}")
+
+    with open(args.output, "w", encoding="utf-8", newline="") as fh:
+        writer = ResultWriter(fh, ResultWriter.format_for(args.output))
+        summary = asyncio.run(run_batch(
+            questions,
+            writer,
+            on_result=report,
+            max_concurrency=args.concurrency,
+            retrieval_workers=args.retrieval_workers,
+            timeout=args.timeout,
+        ))
+    print(f"✅ {summary['questions'] - summary['failed']}/{summary['questions']} answered in "
+          f"{summary['elapsed_s']:.1f}s (p50 {summary['p50_s']:.2f}s, p95 {summary['p95_s']:.2f}s) "
+          f"→ '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
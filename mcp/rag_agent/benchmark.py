@@ -0,0 +1,365 @@
+# benchmark.py
+#
+# Ingestion and retrieval benchmark that runs fully offline: Azure embeddings
+# and chat are replaced by deterministic local stand-ins, and the corpus is
+# generated on the fly.
+#
+#   python benchmark.py --pdfs 20 --pages 30 --k 3,5,10 --queries 20 --json bench.json
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Iterator
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+KPI_TERMS = ["revenue", "EBITDA", "net income", "operating margin", "free cash flow",
+             "headcount", "churn", "ARR", "gross margin", "capex"]
+FILLER_WORDS = ("the of and to in for on with as by from at that this which quarter year "
+                "growth segment region customer product market cost sales report total").split()
+
+
+# === Local stand-ins for the Azure clients ===
+class HashingEmbeddings(Embeddings):
+    """
+    Hashed random projection of the bag of words: each term adds a signed
+    one-hot in a hash-chosen dimension. Deterministic, needs no network, and
+    texts sharing terms end up close, so retrieval results are meaningful.
+    `latency_ms` simulates the round trip of one embedding request.
+    """
+
+    def __init__(self, dim=256, latency_ms=0.0):
+        self.dim = dim
+        self.latency_ms = latency_ms
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for term in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class EchoChatModel(BaseChatModel):
+    """Answers by echoing the question and citing the sources found in the prompt."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo"
+
+    def _reply(self, messages):
+        prompt = messages[-1].content
+        # The stuff prompt's few-shot examples come first; the real question is the last one
+        prompt = prompt[prompt.rfind("QUESTION:"):]
+        question = re.search(r"QUESTION:\s*(.*)", prompt)
+        question = question.group(1).strip() if question else ""
+        sources = list(dict.fromkeys(re.findall(r"^Source:\s*(.+)$", prompt, re.MULTILINE)))
+        return f"Echo: {question}\nSOURCES: {', '.join(sources)}"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        for piece in re.findall(r"\S+\s*", self._reply(messages)):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+
+# === Synthetic corpus ===
+def _pdf_page_stream(lines):
+    body = "".join(f"({line}) Tj T*\n" for line in lines)
+    return f"BT /F1 10 Tf 12 TL 50 790 Td\n{body}ET".encode("latin-1")
+
+
+def write_synthetic_pdf(path, pages, rng, words_per_page=400):
+    """Write a plain-text PDF whose pages mix filler prose with KPI statements."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for _ in range(pages):
+        words = []
+        while len(words) < words_per_page:
+            if rng.random() < 0.1:
+                words += (f"{rng.choice(KPI_TERMS)} was {rng.randint(1, 9999)}.{rng.randint(0, 9)} "
+                          f"in {rng.randint(2015, 2024)}").split()
+            else:
+                words.append(rng.choice(FILLER_WORDS))
+        lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+        content = _pdf_page_stream(lines)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objects.append(None)  # page object, filled in below once its number is known
+        page_no = len(objects)
+        objects[page_no - 1] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                                b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_no - 1))
+        page_refs.append(b"%d 0 R" % page_no)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(page_refs), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as fh:
+        fh.write(out)
+
+
+def generate_corpus(pdf_dir, pdfs, pages, words_per_page, seed):
+    rng = random.Random(seed)
+    os.makedirs(pdf_dir, exist_ok=True)
+    paths = []
+    for i in range(pdfs):
+        path = os.path.join(pdf_dir, f"report_{i:03d}.pdf")
+        write_synthetic_pdf(path, pages, rng, words_per_page)
+        paths.append(path)
+    return paths
+
+
+def generate_questions(count, seed):
+    rng = random.Random(seed + 1)
+    return [f"What was the {rng.choice(KPI_TERMS)} in {rng.randint(2015, 2024)}?" for _ in range(count)]
+
+
+# === Measurement helpers ===
+def percentiles(values, points=(50, 90, 99)):
+    """Nearest-rank percentiles in milliseconds; empty input gives an empty dict."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {f"p{p}": ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000 for p in points}
+    result["max"] = ordered[-1] * 1000
+    result["n"] = len(ordered)
+    return result
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its (PDF worker) children."""
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return {"self": own / 2**20, "children": children / 2**20}
+
+
+class TimedEmbeddings(Embeddings):
+    """Records the wall time of every document-embedding call made through it."""
+
+    def __init__(self, underlying):
+        self.underlying = underlying
+        self.batch_seconds = []
+
+    def embed_documents(self, texts):
+        start = time.perf_counter()
+        vectors = self.underlying.embed_documents(texts)
+        self.batch_seconds.append(time.perf_counter() - start)
+        return vectors
+
+    def embed_query(self, text):
+        return self.underlying.embed_query(text)
+
+
+def _stage_totals(snapshot):
+    """Total seconds per pipeline stage from the metrics registry."""
+    series = snapshot["histograms"].get("rag_stage_seconds", [])
+    return {entry["labels"]["stage"]: entry["sum"] for entry in series}
+
+
+# === Benchmark ===
+def _parse_filters(value, sources):
+    filters = []
+    for item in value.split(","):
+        item = item.strip()
+        if item == "none":
+            filters.append(None)
+        elif item == "first":
+            filters.append(sources[0])
+        elif item:
+            filters.append(item)
+    return filters
+
+
+def run_benchmark(args):
+    workdir = args.workdir or tempfile.mkdtemp(prefix="rag_bench_")
+    pdf_dir = os.path.join(workdir, "pdfs")
+    chroma_dir = os.path.join(workdir, "chroma")
+    shutil.rmtree(chroma_dir, ignore_errors=True)
+
+    # rag_agent reads its paths at import, so point them at the work directory first
+    os.environ["CHROMA_DB_DIR"] = chroma_dir
+    os.environ["INGEST_MANIFEST_PATH"] = os.path.join(chroma_dir, "ingest_manifest.json")
+    os.environ["KEYWORD_INDEX_PATH"] = os.path.join(chroma_dir, "keyword_index.sqlite3")
+    os.environ["EMBEDDING_CACHE_PATH"] = ""
+    import rag_agent
+    from embedding_cache import CachedEmbeddings
+    from metrics import metrics
+
+    print(f"📝 Generating {args.pdfs} PDF(s) x {args.pages} pages in '{pdf_dir}'")
+    paths = generate_corpus(pdf_dir, args.pdfs, args.pages, args.words_per_page, args.seed)
+
+    # === Swap in the local stand-ins ===
+    embedder = TimedEmbeddings(HashingEmbeddings(dim=args.dim, latency_ms=args.embed_latency_ms))
+    embedding_model = embedder
+    if args.embedding_cache:
+        embedding_model = CachedEmbeddings(embedder, namespace=f"hashing-{args.dim}",
+                                           path=os.path.join(workdir, "embedding_cache.sqlite3"))
+    llm = EchoChatModel()
+    rag_agent.get_embedding_model = lambda: embedding_model
+    rag_agent.get_llm = lambda: llm
+
+    file_stats = []
+    split_pdfs = rag_agent.iter_split_pdfs
+
+    def recording_split_pdfs(*split_args, **split_kwargs):
+        for pdf_path, chunks, stats in split_pdfs(*split_args, **split_kwargs):
+            file_stats.append(stats)
+            yield pdf_path, chunks, stats
+
+    rag_agent.iter_split_pdfs = recording_split_pdfs
+
+    # === Ingestion ===
+    start = time.perf_counter()
+    rag_agent.ingest_documents(pdf_dir)
+    ingest_seconds = time.perf_counter() - start
+    total_pages = sum(stats["pages"] for stats in file_stats)
+    total_chunks = sum(stats["chunks"] for stats in file_stats)
+    report = {
+        "corpus": {"pdfs": len(paths), "pages": total_pages, "chunks": total_chunks,
+                   "bytes": sum(os.path.getsize(p) for p in paths)},
+        "ingestion": {
+            "seconds": ingest_seconds,
+            "pages_per_s": total_pages / ingest_seconds if ingest_seconds else 0.0,
+            "chunks_per_s": total_chunks / ingest_seconds if ingest_seconds else 0.0,
+            "stages_ms": {
+                "load": percentiles([stats["load_s"] for stats in file_stats]),
+                "split": percentiles([stats["split_s"] for stats in file_stats]),
+                "token_count": percentiles([stats["count_s"] for stats in file_stats]),
+                "embed_batch": percentiles(embedder.batch_seconds),
+            },
+            "stage_totals_s": _stage_totals(metrics.snapshot()),
+            "peak_rss_mb": peak_rss_mb(),
+        },
+    }
+
+    # Re-running with nothing changed should be close to free
+    start = time.perf_counter()
+    rag_agent.ingest_documents(pdf_dir)
+    report["ingestion"]["noop_seconds"] = time.perf_counter() - start
+
+    # === Queries across k and filter settings ===
+    questions = generate_questions(args.queries, args.seed)
+    sources = [os.path.basename(p) for p in paths]
+    report["queries"] = []
+    for k in [int(value) for value in args.k.split(",")]:
+        for source in _parse_filters(args.filters, sources):
+            start = time.perf_counter()
+            qa_chain = rag_agent.get_qa_chain(source, k)
+            build_seconds = time.perf_counter() - start
+            stage_seconds = {"retrieve": [], "generate": [], "total": []}
+            for question in questions:
+                timer = rag_agent.QueryTimingHandler()
+                start = time.perf_counter()
+                qa_chain.invoke({"question": question}, config={"callbacks": [timer]})
+                stage_seconds["total"].append(time.perf_counter() - start)
+                for stage in ("retrieve", "generate"):
+                    stage_seconds[stage].append(timer.timings[stage])
+            total = sum(stage_seconds["total"])
+            report["queries"].append({
+                "k": k,
+                "filter": source,
+                "chain_build_ms": build_seconds * 1000,
+                "qps": len(questions) / total if total else 0.0,
+                "stages_ms": {stage: percentiles(values) for stage, values in stage_seconds.items()},
+            })
+    report["peak_rss_mb"] = peak_rss_mb()
+    report["metrics"] = metrics.snapshot()
+    report["workdir"] = workdir
+
+    if not args.workdir and not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def _format_ms(stats):
+    if not stats:
+        return "-"
+    return f"p50 {stats['p50']:.1f} · p90 {stats['p90']:.1f} · p99 {stats['p99']:.1f} · max {stats['max']:.1f} ms"
+
+
+def print_report(report):
+    corpus = report["corpus"]
+    ingestion = report["ingestion"]
+    print("\n📊 Benchmark report")
+    print(f"  Corpus: {corpus['pdfs']} PDF(s), {corpus['pages']} pages, {corpus['chunks']} chunks, "
+          f"{corpus['bytes'] / 2**20:.1f} MiB")
+    print(f"  Ingestion: {ingestion['seconds']:.2f}s · {ingestion['pages_per_s']:.1f} pages/s · "
+          f"{ingestion['chunks_per_s']:.1f} chunks/s · no-op re-run {ingestion['noop_seconds']:.2f}s")
+    for stage, stats in ingestion["stages_ms"].items():
+        print(f"    {stage:<12} {_format_ms(stats)}")
+    print("    stage totals: " + " · ".join(f"{stage} {seconds:.2f}s"
+                                           for stage, seconds in ingestion["stage_totals_s"].items()))
+    print(f"  Peak RSS after ingestion: {ingestion['peak_rss_mb']['self']:.0f} MiB "
+          f"(PDF workers {ingestion['peak_rss_mb']['children']:.0f} MiB)")
+    for run in report["queries"]:
+        print(f"  Queries k={run['k']} filter={run['filter'] or '-'}: {run['qps']:.1f} q/s, "
+              f"chain build {run['chain_build_ms']:.1f} ms")
+        for stage, stats in run["stages_ms"].items():
+            print(f"    {stage:<12} {_format_ms(stats)}")
+    print(f"  Peak RSS overall: {report['peak_rss_mb']['self']:.0f} MiB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline ingestion/retrieval benchmark for rag_agent.")
+    parser.add_argument("--pdfs", type=int, default=10, help="number of synthetic PDFs")
+    parser.add_argument("--pages", type=int, default=20, help="pages per PDF")
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--dim", type=int, default=256, help="fake embedding dimension")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0,
+                        help="simulated latency per embedding request")
+    parser.add_argument("--embedding-cache", action="store_true", help="wrap the fake embedder in the SQLite cache")
+    parser.add_argument("--k", default="3,5,10", help="comma-separated k values to query with")
+    parser.add_argument("--filters", default="none,first",
+                        help="comma-separated source filters: 'none', 'first' or a file name")
+    parser.add_argument("--queries", type=int, default=20, help="questions per (k, filter) setting")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="keep the corpus and stores here instead of a temp dir")
+    parser.add_argument("--keep", action="store_true", help="do not delete the temp work dir")
+    parser.add_argument("--json", help="also write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"💾 Report written to '{args.json}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# compact_index.py
+#
+# VECTOR_STORE=compact: int8-quantised vectors in memory-mapped files with
+# exact float32 re-ranking of the best candidates.
+
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from vector_stores import RAGVectorStore
+
+
+class CompactVectorStore(RAGVectorStore):
+    """
+    Brute-force cosine search over int8 codes, re-ranked exactly.
+
+    Every vector is normalised and stored twice in append-only files:
+    as int8 codes with a per-row scale (a quarter of float32, scanned on
+    every query) and as float32 (read only for the top
+    `rerank_candidates` rows of each query). Files are memory-mapped, so
+    opening the store loads nothing and only the int8 codes need to stay
+    resident. Chunk text and metadata live in SQLite. Deleted or replaced
+    rows are tombstoned and reclaimed by `finish_ingestion`.
+    """
+
+    _SCAN_BLOCK = 2048  # rows upcast to float32 at a time while scanning
+
+    def __init__(self, embedding_function: Embeddings, directory: str, rerank_candidates=100,
+                 compact_ratio=0.25):
+        self.embedding_function = embedding_function
+        self.directory = directory
+        self.rerank_candidates = rerank_candidates
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._maps = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "chunks.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id TEXT PRIMARY KEY,
+                row INTEGER NOT NULL UNIQUE,
+                source TEXT,
+                document TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source);
+            CREATE TABLE IF NOT EXISTS sources (name TEXT PRIMARY KEY, sid INTEGER NOT NULL UNIQUE);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            """
+        )
+        self._conn.commit()
+        self.dim = self._meta("dim")
+        self.rows = self._meta("rows") or 0
+        self._truncate_files()
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    # === Files ===
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    _FILES = {
+        # name: (dtype, values per row; 0 = embedding dimension)
+        "codes.i8": (np.int8, 0),
+        "vectors.f32": (np.float32, 0),
+        "scales.f32": (np.float32, 1),
+        "sources.i32": (np.int32, 1),
+        "alive.u8": (np.uint8, 1),
+    }
+
+    def _row_bytes(self, name):
+        dtype, width = self._FILES[name]
+        return np.dtype(dtype).itemsize * (width or self.dim or 0)
+
+    def _truncate_files(self):
+        # Rows appended to the files but never committed to SQLite (e.g. after a crash) are dropped
+        for name in self._FILES:
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > self.rows * self._row_bytes(name):
+                os.truncate(path, self.rows * self._row_bytes(name))
+
+    def _memmaps(self):
+        if self._maps is None and self.rows:
+            self._maps = {}
+            for name, (dtype, width) in self._FILES.items():
+                shape = (self.rows, self.dim) if width == 0 else (self.rows,)
+                self._maps[name] = np.memmap(self._path(name), dtype=dtype, mode="r", shape=shape)
+        return self._maps
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, int(value)))
+
+    def _source_id(self, source, create=False):
+        row = self._conn.execute("SELECT sid FROM sources WHERE name = ?", (source,)).fetchone()
+        if row or not create:
+            return row[0] if row else None
+        (next_sid,) = self._conn.execute("SELECT COALESCE(MAX(sid), -1) + 1 FROM sources").fetchone()
+        self._conn.execute("INSERT INTO sources (name, sid) VALUES (?, ?)", (source, next_sid))
+        return next_sid
+
+    def _tombstone(self, rows):
+        if not rows:
+            return
+        self._maps = None
+        with open(self._path("alive.u8"), "r+b") as fh:
+            for row in sorted(rows):
+                fh.seek(row)
+                fh.write(b"\x00")
+
+    # === Writes ===
+    def upsert_embeddings(self, ids, embeddings, texts, metadatas):
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        scales = np.abs(vectors).max(axis=1) / 127
+        codes = np.round(vectors / np.where(scales == 0, 1, scales)[:, None]).astype(np.int8)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._set_meta("dim", self.dim)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index ({self.dim})")
+
+            metadatas = [metadata or {} for metadata in metadatas]
+            source_ids = np.asarray(
+                [self._source_id(metadata.get("source"), create=True) if metadata.get("source") else -1
+                 for metadata in metadatas],
+                dtype=np.int32,
+            )
+            replaced = self._rows_for_ids(ids)
+            self._tombstone(replaced)
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+
+            first_row = self.rows
+            for name, data in (
+                ("codes.i8", codes), ("vectors.f32", vectors), ("scales.f32", scales.astype(np.float32)),
+                ("sources.i32", source_ids), ("alive.u8", np.ones(len(ids), dtype=np.uint8)),
+            ):
+                with open(self._path(name), "ab") as fh:
+                    fh.write(np.ascontiguousarray(data).tobytes())
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, row, source, document, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (chunk_id, first_row + i, metadata.get("source"), text, json.dumps(metadata, default=str))
+                    for i, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas))
+                ],
+            )
+            self.rows = first_row + len(ids)
+            self._set_meta("rows", self.rows)
+            self._conn.commit()
+            self._maps = None
+
+    def _rows_for_ids(self, ids):
+        rows = []
+        ids = list(ids)
+        for i in range(0, len(ids), 500):
+            part = ids[i:i + 500]
+            placeholders = ",".join("?" * len(part))
+            rows += [r[0] for r in self._conn.execute(
+                f"SELECT row FROM chunks WHERE id IN ({placeholders})", part
+            ).fetchall()]
+        return rows
+
+    def delete(self, ids=None, **kwargs):
+        if not ids:
+            return True
+        with self._lock:
+            self._tombstone(self._rows_for_ids(ids))
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+            self._conn.commit()
+        return True
+
+    def finish_ingestion(self):
+        """Rewrite the files without tombstoned rows once they exceed `compact_ratio` of the index."""
+        with self._lock:
+            maps = self._memmaps()
+            if not maps:
+                return
+            alive_rows = np.flatnonzero(maps["alive.u8"])
+            if self.rows - len(alive_rows) <= self.compact_ratio * self.rows:
+                return
+            for name in self._FILES:
+                with open(self._path(name) + ".tmp", "wb") as fh:
+                    for start in range(0, len(alive_rows), self._SCAN_BLOCK):
+                        fh.write(np.ascontiguousarray(maps[name][alive_rows[start:start + self._SCAN_BLOCK]]).tobytes())
+            self._maps = maps = None
+            for name in self._FILES:
+                os.replace(self._path(name) + ".tmp", self._path(name))
+            # Ascending order keeps the UNIQUE(row) constraint satisfied while rows move down
+            self._conn.executemany(
+                "UPDATE chunks SET row = ? WHERE row = ?",
+                [(new_row, int(old_row)) for new_row, old_row in enumerate(alive_rows)],
+            )
+            self.rows = len(alive_rows)
+            self._set_meta("rows", self.rows)
+            self._conn.commit()
+            print(f"🗜️ Compacted vector index to {self.rows} rows")
+
+    # === Reads ===
+    def ids_for_source(self, source):
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT id FROM chunks WHERE source = ?", (source,))]
+
+    def _documents_for_rows(self, rows):
+        found = {}
+        for i in range(0, len(rows), 500):
+            part = [int(row) for row in rows[i:i + 500]]
+            placeholders = ",".join("?" * len(part))
+            for row, chunk_id, text, metadata in self._conn.execute(
+                f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({placeholders})", part
+            ):
+                found[row] = Document(id=chunk_id, page_content=text, metadata=json.loads(metadata))
+        return found
+
+    def get_documents(self, ids):
+        ids = list(ids)
+        with self._lock:
+            return list(self._documents_for_rows(self._rows_for_ids(ids)).values())
+
+    def iter_chunks(self, page_size=1000, include_text=True):
+        last_row = -1
+        while True:
+            with self._lock:
+                page = self._conn.execute(
+                    "SELECT row, id, document, metadata FROM chunks WHERE row > ? ORDER BY row LIMIT ?",
+                    (last_row, page_size),
+                ).fetchall()
+            if not page:
+                return
+            last_row = page[-1][0]
+            yield ([r[1] for r in page], [r[2] for r in page] if include_text else None,
+                   [json.loads(r[3]) for r in page])
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    # === Search ===
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        """(Document, cosine distance) pairs, nearest first."""
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        with self._lock:
+            maps = self._memmaps()
+            if not maps:
+                return []
+            source_id = None
+            if filter and filter.get("source"):
+                source_id = self._source_id(filter["source"])
+                if source_id is None:
+                    return []
+
+            scores = np.empty(self.rows, dtype=np.float32)
+            codes, scales = maps["codes.i8"], maps["scales.f32"]
+            for start in range(0, self.rows, self._SCAN_BLOCK):
+                end = start + self._SCAN_BLOCK
+                scores[start:end] = (codes[start:end].astype(np.float32) @ query) * scales[start:end]
+            eligible = maps["alive.u8"] == 1
+            if source_id is not None:
+                eligible &= maps["sources.i32"] == source_id
+            scores[~eligible] = -np.inf
+
+            available = int(eligible.sum())
+            if not available:
+                return []
+            candidates = min(max(self.rerank_candidates, k), available)
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            top.sort()  # sequential reads from the float32 file
+            exact = maps["vectors.f32"][top] @ query
+            order = np.argsort(-exact)[:k]
+            rows = top[order]
+            documents = self._documents_for_rows(rows)
+        return [(documents[int(row)], float(1 - exact[i])) for row, i in zip(rows, order) if int(row) in documents]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k, filter)
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k, filter)
+
+    def _select_relevance_score_fn(self):
+        return self._cosine_relevance_score_fn
@@ -0,0 +1,106 @@
+# context_packing.py
+
+from typing import Any, List
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from keyword_index import tokenize
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def drop_near_duplicates(docs, threshold=0.9):
+    """Keep the first (best-ranked) of any chunks whose word sets overlap >= `threshold`."""
+    kept = []
+    kept_terms = []
+    for doc in docs:
+        terms = set(tokenize(doc.page_content))
+        if any(_jaccard(terms, other) >= threshold for other in kept_terms):
+            continue
+        kept.append(doc)
+        kept_terms.append(terms)
+    return kept
+
+
+def _join_overlapping(first, second, min_overlap=20):
+    """Join two chunk texts, removing the splitter overlap if `second` continues `first`."""
+    longest = min(len(first), len(second))
+    for size in range(longest, min_overlap - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return None
+
+
+def merge_same_page(docs):
+    """
+    Merge chunks from the same source and page into one block, in the order
+    the text appears where the overlap reveals it. The block keeps the rank
+    of its best chunk.
+    """
+    blocks = {}
+    for doc in docs:
+        key = (doc.metadata.get("source"), doc.metadata.get("page"))
+        if key not in blocks:
+            blocks[key] = Document(id=doc.id, page_content=doc.page_content, metadata=dict(doc.metadata))
+            continue
+        block = blocks[key]
+        text = block.page_content
+        block.page_content = (
+            _join_overlapping(text, doc.page_content)
+            or _join_overlapping(doc.page_content, text)
+            or f"{text}\n...\n{doc.page_content}"
+        )
+    return list(blocks.values())
+
+
+def pack_to_budget(docs, encoding, max_tokens):
+    """Take blocks in rank order while they fit in `max_tokens`; truncate only a lone oversized first block."""
+    packed = []
+    used = 0
+    for doc in docs:
+        tokens = encoding.encode(doc.page_content, disallowed_special=())
+        if used + len(tokens) <= max_tokens:
+            packed.append(doc)
+            used += len(tokens)
+        elif not packed:
+            packed.append(Document(
+                id=doc.id,
+                page_content=encoding.decode(tokens[:max_tokens]),
+                metadata=doc.metadata,
+            ))
+            used = max_tokens
+    return packed
+
+
+class PackedContextRetriever(BaseRetriever):
+    """
+    Context-assembly stage between the retriever and the "stuff" chain:
+    drops near-duplicate chunks, merges chunks from the same page and packs
+    the result into a token budget.
+    """
+
+    base_retriever: BaseRetriever
+    encoding: Any
+    max_tokens: int = 1500
+    duplicate_threshold: float = 0.9
+
+    def pack(self, docs):
+        docs = drop_near_duplicates(docs, self.duplicate_threshold)
+        docs = merge_same_page(docs)
+        return pack_to_budget(docs, self.encoding, self.max_tokens)
+
+    @staticmethod
+    def _child_config(run_manager):
+        # Nest the base retriever's run under ours so tracing and metrics handlers see it
+        return {"callbacks": run_manager.get_child()} if run_manager else None
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.pack(self.base_retriever.invoke(query, config=self._child_config(run_manager)))
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.pack(await self.base_retriever.ainvoke(query, config=self._child_config(run_manager)))
@@ -0,0 +1,147 @@
+# embedding_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+from metrics import metrics
+
+
+def text_key(namespace, text):
+    return hashlib.sha256(f"{namespace}\0{text}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrap an `Embeddings` model with a persistent SQLite cache.
+
+    Vectors are keyed by (namespace, sha256(text)) -- the namespace should be
+    the embedding deployment so switching models never returns stale vectors.
+    Only cache misses are sent to the wrapped model. The cache holds at most
+    `max_entries` vectors and evicts the least recently used ones.
+    """
+
+    _LOOKUP_CHUNK = 500  # stay below SQLite's bound-parameter limit
+
+    def __init__(self, underlying, namespace, path, max_entries=100_000):
+        self.underlying = underlying
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    # === Cache access ===
+    def _get_many(self, keys, touch=True):
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), self._LOOKUP_CHUNK):
+                part = keys[i:i + self._LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                found.update(rows)
+                if touch and rows:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key, _ in rows],
+                    )
+            if touch:
+                self._conn.commit()
+        return {key: array("f", blob).tolist() for key, blob in found.items()}
+
+    def _put_many(self, items):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN"
+                " (SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def cached_mask(self, texts):
+        """Which `texts` are already cached (does not count as a hit or refresh LRU order)."""
+        keys = [text_key(self.namespace, t) for t in texts]
+        found = self._get_many(keys, touch=False)
+        return [key in found for key in keys]
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
+
+    # === Embeddings interface ===
+    def embed_documents(self, texts):
+        keys = [text_key(self.namespace, t) for t in texts]
+        vectors = self._get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        metrics.inc("rag_embedding_cache_hits_total", len(texts) - len(missing))
+        metrics.inc("rag_embedding_cache_misses_total", len(missing))
+
+        if missing:
+            fresh = self.underlying.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), fresh))
+            self._put_many(new_items)
+            vectors.update(new_items)
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text):
+        key = text_key(self.namespace, text)
+        cached = self._get_many([key])
+        with self._lock:
+            if key in cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.inc("rag_embedding_cache_hits_total" if key in cached else "rag_embedding_cache_misses_total")
+        if key in cached:
+            return cached[key]
+        vector = self.underlying.embed_query(text)
+        self._put_many([(key, vector)])
+        return vector
@@ -0,0 +1,133 @@
+# embedding_pipeline.py
+
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from openai import RateLimitError
+
+from metrics import metrics
+
+
+# === Rate limiting ===
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `capacity` per `period` seconds."""
+
+    def __init__(self, capacity, period=60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """Block until `amount` units are available, then take them. Returns seconds waited."""
+        # A single request larger than the bucket could never be served otherwise
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return waited
+                delay = (amount - self.available) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider reported a 429."""
+        with self.lock:
+            self._refill()
+            self.available = 0.0
+
+
+class RateLimiter:
+    """Tokens-per-minute and requests-per-minute limits for one deployment."""
+
+    def __init__(self, tokens_per_minute, requests_per_minute):
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.requests = TokenBucket(requests_per_minute)
+
+    def acquire(self, tokens):
+        return self.requests.acquire(1) + self.tokens.acquire(tokens)
+
+    def penalise(self):
+        self.tokens.drain()
+        self.requests.drain()
+
+
+# === Embedding with retry ===
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def embed_with_retry(embedding_model, texts, tokens, limiter, max_retries=6, base_delay=2.0):
+    """Embed one batch, waiting on the limiter first and backing off on 429 responses."""
+    for attempt in range(max_retries + 1):
+        # A batch served entirely from the embedding cache makes no request
+        waited = limiter.acquire(tokens) if tokens else 0.0
+        if waited > 0:
+            metrics.inc("rag_rate_limit_sleeps_total", reason="limiter")
+            metrics.inc("rag_rate_limit_sleep_seconds_total", waited, reason="limiter")
+        if waited > 0.5:
+            print(f"⏳ Waited {waited:.1f}s for embedding rate limit")
+        try:
+            with metrics.span("embed"):
+                vectors = embedding_model.embed_documents(texts)
+            if tokens:
+                metrics.inc("rag_embed_requests_total")
+                metrics.inc("rag_embed_tokens_total", tokens)
+            return vectors
+        except RateLimitError as e:
+            metrics.inc("rag_rate_limited_total")
+            if attempt == max_retries:
+                raise
+            limiter.penalise()
+            delay = _retry_after(e) or base_delay * (2 ** attempt)
+            delay += random.uniform(0, delay / 4)
+            print(f"⚠️ Rate limited (429), retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            metrics.inc("rag_rate_limit_sleeps_total", reason="retry")
+            metrics.inc("rag_rate_limit_sleep_seconds_total", delay, reason="retry")
+            time.sleep(delay)
+
+
+def embed_batches(embedding_model, batches, limiter, max_workers=4):
+    """
+    Embed `batches` concurrently, keeping up to `max_workers` requests in flight.
+
+    `batches` is an iterable of (batch, texts, tokens) tuples; yields
+    (batch, vectors) in completion order so the caller can write one batch
+    while others are still being embedded.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embed") as pool:
+        in_flight = {}
+        batches = iter(batches)
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < max_workers:
+                item = next(batches, None)
+                if item is None:
+                    exhausted = True
+                    break
+                batch, texts, tokens = item
+                future = pool.submit(embed_with_retry, embedding_model, texts, tokens, limiter)
+                in_flight[future] = batch
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = in_flight.pop(future)
+                yield batch, future.result()
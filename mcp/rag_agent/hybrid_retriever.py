@@ -0,0 +1,81 @@
+# hybrid_retriever.py
+
+import asyncio
+from typing import Any, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+
+def reciprocal_rank_fusion(rankings, rrf_k=60):
+    """Fuse ranked ID lists: score(id) = sum over lists of 1 / (rrf_k + rank)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Dense + BM25 retrieval fused with reciprocal-rank fusion.
+
+    Each side contributes its top `fetch_k` candidates; the best `k` fused
+    chunks are returned. Keyword hits missing from the dense results are
+    fetched from the vector store by ID.
+    """
+
+    vectorstore: Any
+    keyword_index: Any
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+    filter_source: Optional[str] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.search(query)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return await self.asearch(query)
+
+    def _search_filter(self):
+        return {"source": self.filter_source} if self.filter_source else None
+
+    def _keyword_ids(self, query):
+        keyword_hits = self.keyword_index.search(query, k=self.fetch_k, source=self.filter_source)
+        return [chunk_id for chunk_id, _ in keyword_hits]
+
+    def _fuse(self, dense_docs, keyword_ids):
+        docs_by_id = {doc.id: doc for doc in dense_docs if doc.id}
+        fused = reciprocal_rank_fusion([list(docs_by_id), keyword_ids], rrf_k=self.rrf_k)[:self.k]
+        missing = [chunk_id for chunk_id in fused if chunk_id not in docs_by_id]
+        return fused, docs_by_id, missing
+
+    @staticmethod
+    def _ranked(fused, docs_by_id, fetched):
+        for doc in fetched:
+            docs_by_id[doc.id] = doc
+        return [docs_by_id[chunk_id] for chunk_id in fused if chunk_id in docs_by_id]
+
+    def search(self, query: str, query_vector=None) -> List[Document]:
+        """Retrieve for `query`, reusing `query_vector` for the dense side when it is already embedded."""
+        search_filter = self._search_filter()
+        if query_vector is None:
+            dense_docs = self.vectorstore.similarity_search(query, k=self.fetch_k, filter=search_filter)
+        else:
+            dense_docs = self.vectorstore.similarity_search_by_vector(query_vector, k=self.fetch_k, filter=search_filter)
+        fused, docs_by_id, missing = self._fuse(dense_docs, self._keyword_ids(query))
+        return self._ranked(fused, docs_by_id, self.vectorstore.get_documents(missing) if missing else [])
+
+    async def asearch(self, query: str, query_vector=None) -> List[Document]:
+        """Async `search`: the dense and keyword searches run concurrently before fusion."""
+        search_filter = self._search_filter()
+        if query_vector is None:
+            dense = self.vectorstore.asimilarity_search(query, k=self.fetch_k, filter=search_filter)
+        else:
+            dense = self.vectorstore.asimilarity_search_by_vector(query_vector, k=self.fetch_k, filter=search_filter)
+        # The BM25 index is a local SQLite file, so its search runs in a thread alongside the dense one
+        dense_docs, keyword_ids = await asyncio.gather(dense, asyncio.to_thread(self._keyword_ids, query))
+        fused, docs_by_id, missing = self._fuse(dense_docs, keyword_ids)
+        fetched = await asyncio.to_thread(self.vectorstore.get_documents, missing) if missing else []
+        return self._ranked(fused, docs_by_id, fetched)
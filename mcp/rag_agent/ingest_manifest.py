@@ -0,0 +1,172 @@
+# ingest_manifest.py
+
+import hashlib
+import json
+import os
+import time
+
+# 2: chunk IDs include the file name (version 1 manifests are re-ingested)
+MANIFEST_VERSION = 2
+
+
+def inventory_path(manifest_path):
+    """The compact per-file inventory is written next to the manifest."""
+    return os.path.join(os.path.dirname(os.path.abspath(manifest_path)), "corpus_inventory.json")
+
+
+def read_inventory(manifest_path):
+    """
+    Read {file name: {pages, chunks, hash, ingested_at}} without loading the
+    manifest's chunk ID lists. Returns None if no complete inventory exists.
+    """
+    try:
+        with open(inventory_path(manifest_path), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Hash a file's content in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_chunk_id(source, file_hash, index, text):
+    """
+    Deterministic chunk ID: same file name + same content + same chunking
+    -> same ID. The name keeps same-content copies (e.g. "report (1).pdf")
+    from sharing, and then deleting, each other's chunks.
+    """
+    digest = hashlib.sha256(f"{source}\0{file_hash}:{index}:".encode("utf-8"))
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+class IngestManifest:
+    """
+    Record of what has been ingested into the vector store.
+
+    Stored as JSON next to the vector store:
+        {
+          "version": 2,
+          "splitter": {...},
+          "files": {
+            "<file name>": {"hash", "size", "mtime_ns", "pages", "chunk_ids", "ingested_at"}
+          }
+        }
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.splitter = {}
+        self.files = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable manifest '{self.path}': {e}")
+            return
+        if data.get("version") == 1:
+            print("ℹ️ Manifest predates per-file chunk IDs; re-ingesting all files.")
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            print(f"[WARN] Ignoring manifest with unsupported version {data.get('version')}")
+            return
+        self.splitter = data.get("splitter", {})
+        self.files = data.get("files", {})
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2)
+        os.replace(tmp_path, path)
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._write_json(
+            self.path,
+            {"version": MANIFEST_VERSION, "splitter": self.splitter, "files": self.files},
+        )
+        inventory = self.inventory()
+        if inventory is not None:
+            self._write_json(inventory_path(self.path), inventory)
+        elif os.path.exists(inventory_path(self.path)):
+            os.remove(inventory_path(self.path))
+
+    def fingerprint(self, path):
+        """
+        Return the content hash of `path`, reusing the recorded hash when
+        size and mtime are unchanged so an unchanged corpus is not re-read.
+        """
+        stat = os.stat(path)
+        entry = self.files.get(os.path.basename(path))
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry["hash"], stat
+        return file_sha256(path), stat
+
+    def diff(self, paths, splitter):
+        """
+        Compare files on disk with the manifest.
+
+        Returns (to_ingest, to_remove, hashes):
+          to_ingest -- paths that are new or whose content changed
+          to_remove -- file names whose recorded chunks must be deleted
+          hashes    -- {path: (hash, stat)} for every path on disk
+        """
+        splitter_changed = bool(self.files) and self.splitter != splitter
+        if splitter_changed:
+            print("✂️ Splitter settings changed since last ingestion; re-chunking all files.")
+
+        hashes = {path: self.fingerprint(path) for path in paths}
+        on_disk = {os.path.basename(path) for path in paths}
+
+        to_ingest = []
+        to_remove = [name for name in self.files if name not in on_disk]
+        for path, (file_hash, _) in hashes.items():
+            entry = self.files.get(os.path.basename(path))
+            if entry is None:
+                to_ingest.append(path)
+            elif splitter_changed or entry.get("hash") != file_hash:
+                to_ingest.append(path)
+                to_remove.append(os.path.basename(path))
+        return to_ingest, to_remove, hashes
+
+    def record(self, path, file_hash, stat, chunk_ids, pages):
+        self.files[os.path.basename(path)] = {
+            "hash": file_hash,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "pages": pages,
+            "chunk_ids": list(chunk_ids),
+            "ingested_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+
+    def forget(self, name):
+        return self.files.pop(name, None)
+
+    def inventory(self):
+        """
+        {file name: {pages, chunks, hash, ingested_at}} for every ingested
+        file, or None when an entry predates page counts.
+        """
+        if any("pages" not in entry for entry in self.files.values()):
+            return None
+        return {
+            name: {
+                "pages": entry["pages"],
+                "chunks": len(entry["chunk_ids"]),
+                "hash": entry["hash"],
+                "ingested_at": entry["ingested_at"],
+            }
+            for name, entry in self.files.items()
+        }
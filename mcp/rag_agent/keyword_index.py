@@ -0,0 +1,183 @@
+# keyword_index.py
+
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+# Words and numbers, keeping "2022", "1.234,5" and "3.5%"-style figures as single terms
+TOKEN_PATTERN = re.compile(r"\w+(?:[.,]\w+)*")
+
+
+# Function words carry no ranking signal but have the longest posting lists
+STOPWORDS = frozenset("""
+    a about above after again all also am an and any are as at be been before being below between both but by
+    can could did do does doing down during each few for from further had has have having he her here hers him
+    his how i if in into is it its itself just me more most my no nor not of off on once only or other our ours
+    out over own same she should so some such than that the their theirs them then there these they this those
+    through to too under until up very was we were what when where which while who whom why will with would you
+    your yours
+""".split())
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index with BM25 scoring, stored in SQLite next to the vector store.
+
+    Chunks are added and removed by the same IDs used in the vector store,
+    so the index follows incremental ingestion. Only IDs, sources and term
+    frequencies are stored; the chunk text itself stays in the vector store.
+    """
+
+    def __init__(self, path, k1=1.5, b=0.75, max_df_ratio=0.5):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        # Query terms found in more than this share of chunks are skipped, as with stopwords
+        self.max_df_ratio = max_df_ratio
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id TEXT PRIMARY KEY,
+                source TEXT,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, chunk_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk_id);
+            CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source);
+            CREATE TABLE IF NOT EXISTS stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                total_docs INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO stats (id, total_docs, total_length) VALUES (0, 0, 0);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            """
+        )
+        self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT total_docs FROM stats").fetchone()[0]
+
+    def get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM meta")
+            self._conn.execute("UPDATE stats SET total_docs = 0, total_length = 0")
+            self._conn.commit()
+
+    def _delete_locked(self, ids):
+        rows = []
+        for i in range(0, len(ids), 500):
+            part = ids[i:i + 500]
+            placeholders = ",".join("?" * len(part))
+            rows += self._conn.execute(
+                f"SELECT id, length FROM chunks WHERE id IN ({placeholders})", part
+            ).fetchall()
+        if not rows:
+            return
+        existing = [chunk_id for chunk_id, _ in rows]
+        self._conn.executemany("DELETE FROM postings WHERE chunk_id = ?", [(i,) for i in existing])
+        self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(i,) for i in existing])
+        self._conn.execute(
+            "UPDATE stats SET total_docs = total_docs - ?, total_length = total_length - ?",
+            (len(rows), sum(length for _, length in rows)),
+        )
+
+    def add(self, ids, texts, metadatas):
+        """Index chunks; re-adding an existing ID replaces its entry."""
+        chunk_rows = []
+        posting_rows = []
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            terms = Counter(tokenize(text))
+            chunk_rows.append((chunk_id, (metadata or {}).get("source"), sum(terms.values())))
+            posting_rows.extend((term, chunk_id, tf) for term, tf in terms.items())
+        with self._lock:
+            self._delete_locked(list(ids))
+            self._conn.executemany("INSERT INTO chunks (id, source, length) VALUES (?, ?, ?)", chunk_rows)
+            self._conn.executemany("INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)", posting_rows)
+            self._conn.execute(
+                "UPDATE stats SET total_docs = total_docs + ?, total_length = total_length + ?",
+                (len(chunk_rows), sum(length for _, _, length in chunk_rows)),
+            )
+            self._conn.commit()
+
+    def delete(self, ids):
+        with self._lock:
+            self._delete_locked(list(ids))
+            self._conn.commit()
+
+    def search(self, query, k=20, source=None):
+        """Return [(chunk_id, score)] of the top `k` chunks by BM25, optionally for one source."""
+        terms = list(dict.fromkeys(term for term in tokenize(query) if term not in STOPWORDS))
+        if not terms:
+            return []
+        placeholders = ",".join("?" * len(terms))
+        with self._lock:
+            total_docs, total_length = self._conn.execute(
+                "SELECT total_docs, total_length FROM stats"
+            ).fetchone()
+            if not total_docs:
+                return []
+            doc_freqs = dict(self._conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) GROUP BY term", terms
+            ).fetchall())
+            if not doc_freqs:
+                return []
+            # Near-ubiquitous terms barely change the ranking but dominate the postings read;
+            # keep the rarest term so that a query of only common words still matches
+            rarest = min(doc_freqs, key=doc_freqs.get)
+            max_df = self.max_df_ratio * total_docs
+            idfs = {
+                term: math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                for term, df in doc_freqs.items()
+                if df <= max_df or term == rarest
+            }
+
+            # Score and rank in SQLite, so only the top `k` rows reach Python
+            values = ",".join("(?, ?)" for _ in idfs)
+            source_clause = " WHERE c.source = ?" if source else ""
+            return self._conn.execute(
+                f"WITH query_terms (term, idf) AS (VALUES {values})"
+                " SELECT p.chunk_id, SUM(q.idf * p.tf * (? + 1) / (p.tf + ? * (1 - ? + ? * c.length / ?))) AS score"
+                " FROM query_terms q"
+                " JOIN postings p ON p.term = q.term"
+                " JOIN chunks c ON c.id = p.chunk_id"
+                f"{source_clause}"
+                " GROUP BY p.chunk_id ORDER BY score DESC, p.chunk_id LIMIT ?",
+                [value for item in idfs.items() for value in item]
+                + [self.k1, self.k1, self.b, self.b, total_length / total_docs]
+                + ([source] if source else [])
+                + [k],
+            ).fetchall()
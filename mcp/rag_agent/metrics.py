@@ -0,0 +1,177 @@
+# metrics.py
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+METRIC_HELP = {
+    "rag_stage_seconds": "Wall time of one pipeline stage (load, split, token_count, embed, write, query_embed, retrieve, generate).",
+    "rag_query_seconds": "End-to-end latency of one question.",
+    "rag_pages_total": "PDF pages loaded.",
+    "rag_chunks_total": "Chunks produced by the splitter.",
+    "rag_embed_tokens_total": "Tokens sent to the embedding deployment.",
+    "rag_embed_requests_total": "Embedding requests made.",
+    "rag_rate_limit_sleep_seconds_total": "Seconds spent sleeping for the embedding rate limit.",
+    "rag_rate_limit_sleeps_total": "Times an embedding request had to sleep before being sent.",
+    "rag_rate_limited_total": "429 responses from the embedding deployment.",
+    "rag_embedding_cache_hits_total": "Texts served from the embedding cache.",
+    "rag_embedding_cache_misses_total": "Texts sent to the embedding model.",
+    "rag_answer_cache_hits_total": "Questions answered from the semantic answer cache.",
+    "rag_answer_cache_misses_total": "Questions that missed the semantic answer cache.",
+    "rag_batch_questions_total": "Questions answered in batch mode, by status (ok or error).",
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms, labelled Prometheus-style.
+
+    Everything is kept in memory under one lock; `snapshot()` gives a JSON
+    friendly view and `to_prometheus()` the text exposition format, so the
+    same numbers can be dumped to a file for node_exporter's textfile
+    collector or returned from a tool call.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}    # name -> {label key: value}
+        self._histograms = {}  # name -> {label key: _Histogram}
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+
+    def inc(self, name, value=1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(self.buckets)
+            series[key].observe(value)
+
+    @contextmanager
+    def span(self, stage, name="rag_stage_seconds", **labels):
+        """Time the enclosed block into histogram `name` with label stage=`stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, stage=stage, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # === Export ===
+    def snapshot(self):
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": hist.count,
+                        "sum": hist.sum,
+                        "mean": hist.sum / hist.count if hist.count else 0.0,
+                        "buckets": {str(bound): total for bound, total in hist.cumulative()},
+                    }
+                    for key, hist in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms, "generated_at": time.time()}
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in METRIC_HELP:
+                    lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                if name in METRIC_HELP:
+                    lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in sorted(series.items()):
+                    for bound, total in hist.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', f'{bound:g}')])} {total}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {hist.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist.sum:g}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, min_interval=0.0):
+        """
+        Write the metrics to `path` (JSON for *.json, Prometheus text
+        otherwise), atomically. Skipped if the last export was less than
+        `min_interval` seconds ago. Returns whether a file was written.
+        """
+        now = time.monotonic()
+        if min_interval and now - self._last_export < min_interval:
+            return False
+        self._last_export = now
+        if path.endswith(".json"):
+            content = json.dumps(self.snapshot(), indent=2)
+        else:
+            content = self.to_prometheus()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            fh.write(content)
+        os.replace(tmp_path, path)
+        return True
+
+
+# Process-wide registry shared by all pipeline modules
+metrics = MetricsRegistry()
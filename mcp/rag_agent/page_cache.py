@@ -0,0 +1,50 @@
+# page_cache.py
+#
+# Extracted page text per PDF, keyed by the file's content hash, so that a
+# change of splitter settings re-chunks without re-parsing the PDFs.
+
+import gzip
+import json
+import os
+
+from langchain_core.documents import Document
+
+
+def _cache_path(cache_dir, file_hash):
+    return os.path.join(cache_dir, f"{file_hash}.json.gz")
+
+
+def read_cached_pages(cache_dir, file_hash):
+    """Page Documents stored for `file_hash`, or None if they are not cached."""
+    try:
+        with gzip.open(_cache_path(cache_dir, file_hash), "rt", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return [Document(page_content=page["text"], metadata=page["metadata"]) for page in data["pages"]]
+
+
+def write_cached_pages(cache_dir, file_hash, pages):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(cache_dir, file_hash)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    # `source` is the file name, not part of the content the cache is keyed by
+    data = {"pages": [
+        {"text": page.page_content, "metadata": {k: v for k, v in page.metadata.items() if k != "source"}}
+        for page in pages
+    ]}
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+        json.dump(data, fh, default=str)
+    os.replace(tmp_path, path)
+
+
+def prune_page_cache(cache_dir, keep_hashes):
+    """Delete cached pages of files that are no longer in the corpus."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if name.endswith(".json.gz") and name[:-len(".json.gz")] not in keep_hashes:
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+    return removed
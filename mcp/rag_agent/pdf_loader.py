@@ -0,0 +1,127 @@
+# pdf_loader.py
+#
+# Parses and chunks PDFs in worker processes. Kept free of Azure/Chroma
+# imports so that workers stay light.
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+import tiktoken
+from langchain_community.document_loaders import PyPDFLoader
+
+from ingest_manifest import file_sha256
+from page_cache import read_cached_pages, write_cached_pages
+from splitters import make_splitter
+
+
+def load_pdf_pages(pdf_path):
+    """Load one PDF as page Documents tagged with `source` and a 1-based `page`."""
+    pages = PyPDFLoader(pdf_path).load()
+    for page in pages:
+        page.metadata["source"] = os.path.basename(pdf_path)
+        if "page" in page.metadata:
+            page.metadata["page"] = int(page.metadata["page"]) + 1  # Convert to 1-based
+    return pages
+
+
+def count_chunk_tokens(chunks, encoding_name):
+    """Store each chunk's token count in `metadata["tokens"]`, encoding the whole file in one batch."""
+    encoding = tiktoken.get_encoding(encoding_name)
+    counts = encoding.encode_batch([chunk.page_content for chunk in chunks], disallowed_special=())
+    for chunk, tokens in zip(chunks, counts):
+        chunk.metadata["tokens"] = len(tokens)
+
+
+def load_pdf_pages_cached(pdf_path, page_cache_dir=None, file_hash=None):
+    """Returns (pages, cache_hit); parsed pages are stored under the file's content hash."""
+    if not page_cache_dir:
+        return load_pdf_pages(pdf_path), False
+    file_hash = file_hash or file_sha256(pdf_path)
+    pages = read_cached_pages(page_cache_dir, file_hash)
+    if pages is not None:
+        # The same content may be cached under another name (a copy or a renamed file)
+        source = os.path.basename(pdf_path)
+        for page in pages:
+            page.metadata["source"] = source
+        return pages, True
+    pages = load_pdf_pages(pdf_path)
+    write_cached_pages(page_cache_dir, file_hash, pages)
+    return pages, False
+
+
+def load_and_split_pdf(pdf_path, splitter_settings, encoding_name=None, page_cache_dir=None, file_hash=None):
+    """
+    Worker: parse and chunk a single PDF. Returns (pdf_path, chunks, stats).
+
+    `splitter_settings` are the keyword arguments of `splitters.make_splitter`.
+    With `encoding_name`, chunks also carry their token count so it is
+    computed once, in parallel with other files, rather than at embedding time.
+    With `page_cache_dir`, page text is reused from an earlier parse of the
+    same file content.
+    """
+    start = time.perf_counter()
+    pages, cache_hit = load_pdf_pages_cached(pdf_path, page_cache_dir, file_hash)
+    loaded = time.perf_counter()
+
+    chunks = make_splitter(**splitter_settings).split_documents(pages)
+    split = time.perf_counter()
+
+    if encoding_name and chunks:
+        count_chunk_tokens(chunks, encoding_name)
+    counted = time.perf_counter()
+
+    stats = {
+        "pages": len(pages),
+        "chunks": len(chunks),
+        "page_cache_hit": cache_hit,
+        "load_s": loaded - start,
+        "split_s": split - loaded,
+        "count_s": counted - split,
+    }
+    return pdf_path, chunks, stats
+
+
+def _mp_context():
+    # Ingestion runs in the MCP server's background thread, and forking a
+    # multi-threaded process can leave a child stuck on a lock another thread
+    # held (logging, HTTP clients, SQLite). "spawn" starts clean workers; it
+    # re-imports the entry script, so entry points keep their work under
+    # `if __name__ == "__main__"` and import without side effects.
+    return multiprocessing.get_context("spawn")
+
+
+def iter_split_pdfs(files, splitter_settings, max_workers=None, encoding_name=None,
+                    page_cache_dir=None, file_hashes=None):
+    """
+    Parse and chunk `files` in parallel, yielding (pdf_path, chunks, stats)
+    for each file as soon as its worker finishes. Only a bounded number of
+    files is in flight, so memory does not grow with the size of the corpus.
+    `file_hashes` ({path: sha256}) saves workers re-hashing files for the page cache.
+    """
+    file_hashes = file_hashes or {}
+    files = list(files)
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(files) <= 1:
+        for pdf_path in files:
+            yield load_and_split_pdf(pdf_path, splitter_settings, encoding_name,
+                                     page_cache_dir, file_hashes.get(pdf_path))
+        return
+
+    workers = min(max_workers, len(files))
+    # Bounded prefetch: at most two files per worker are parsed ahead of the consumer
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context()) as pool:
+        pending = set()
+        remaining = iter(files)
+        while True:
+            for pdf_path in islice(remaining, max_pending - len(pending)):
+                pending.add(pool.submit(load_and_split_pdf, pdf_path, splitter_settings, encoding_name,
+                                        page_cache_dir, file_hashes.get(pdf_path)))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
@@ -1,39 +1,242 @@
 # server.py
 
-from mcp.server.fastmcp import FastMCP
-from rag_agent import ingest_documents, get_qa_chain
+import asyncio
+import io
+import json
+import os
+import sys
+import threading
+import time
+from mcp.server.fastmcp import Context, FastMCP
+from rag_agent import (
+    ingest_documents, get_qa_chain, get_corpus_inventory, aanswer_question, format_timings,
+    list_pdf_files_from_vector_store, load_vector_store, sync_keyword_index,
+)
+from batch_qa import ResultWriter, assign_source_filters, parse_questions, resolve_output_path, run_batch
+from metrics import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Concurrent query_kpi calls allowed against the Azure quota, and per-call timeout
+QUERY_MAX_CONCURRENCY = int(os.getenv("QUERY_MAX_CONCURRENCY", "4"))
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "120"))
+# How often partial answers are pushed to the client as progress notifications
+PROGRESS_INTERVAL_SECONDS = float(os.getenv("PROGRESS_INTERVAL_SECONDS", "0.5"))
+# With a shared store (pgvector), one replica ingests and the others set INGEST_ON_STARTUP=false;
+# those only refresh their local keyword index from the store every KEYWORD_SYNC_INTERVAL seconds
+INGEST_ON_STARTUP = os.getenv("INGEST_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+KEYWORD_SYNC_INTERVAL = float(os.getenv("KEYWORD_SYNC_INTERVAL", "300"))
+
 mcp = FastMCP("rag_agent")
+query_slots = asyncio.Semaphore(QUERY_MAX_CONCURRENCY)
+
+
+# === Startup: serve the tool list immediately, ingest in the background ===
+class Readiness:
+    """Background start-up state reported by query_kpi."""
+
+    def __init__(self):
+        self.status = "starting"  # starting -> ingesting -> loading -> ready | failed
+        self.detail = ""
+        self.since = time.time()
+        self.corpus_available = False
+
+    def set(self, status, detail=""):
+        self.status = status
+        self.detail = detail
+        self.since = time.time()
+
+    def describe(self):
+        text = f"{self.status} for {time.time() - self.since:.0f}s"
+        return f"{text}: {self.detail}" if self.detail else text
+
+
+readiness = Readiness()
+
+
+def _sync_keyword_index_periodically():
+    while True:
+        time.sleep(KEYWORD_SYNC_INTERVAL)
+        try:
+            sync_keyword_index()
+        except Exception as e:
+            logger.warning(f"[WARN] Keyword index sync failed: {e}")
+
+
+def _warm_up():
+    if INGEST_ON_STARTUP:
+        # A store left by a previous run can answer questions while new PDFs are ingested
+        readiness.corpus_available = bool(get_corpus_inventory())
+        readiness.set("ingesting")
+        try:
+            ingest_documents()
+        except Exception as e:
+            logger.warning(f"[WARN] Document ingestion skipped or failed: {e}")
+            readiness.detail = f"ingestion failed: {e}"
+    else:
+        readiness.set("loading", "query-only replica; ingestion is left to another replica")
+        try:
+            readiness.corpus_available = load_vector_store().count() > 0
+            sync_keyword_index()
+            if KEYWORD_SYNC_INTERVAL > 0:
+                threading.Thread(target=_sync_keyword_index_periodically, name="rag-keyword-sync",
+                                 daemon=True).start()
+        except Exception as e:
+            logger.warning(f"[WARN] Keyword index sync failed: {e}")
+            readiness.detail = f"keyword index sync failed: {e}"
+    readiness.set("loading", readiness.detail)
+    try:
+        # Warm the shared vector store, LLM client and unfiltered chain
+        get_qa_chain()
+        readiness.set("ready", readiness.detail)
+    except Exception as e:
+        logger.error(f"[ERROR] RAG agent initialisation failed: {e}")
+        readiness.set("failed", str(e))
+
+
+class _PrintsToStderr:
+    """
+    Stand-in for sys.stdout while serving over stdio: the MCP transport keeps
+    writing JSON-RPC to the real stdout buffer, while the pipeline's progress
+    print()s go to stderr instead of corrupting the protocol stream.
+    """
+
+    def __init__(self, stdout):
+        self.buffer = stdout.buffer
+
+    def write(self, text):
+        return sys.stderr.write(text)
+
+    def flush(self):
+        sys.stderr.flush()
+
 
-# Try to ingest documents and load the chain on server startup
-try:
-    ingest_documents()
-except Exception as e:
-    logger.warning(f"[WARN] Document ingestion skipped or failed: {e}")
+def _format_sources(docs):
+    source_info = ""
+    for doc in docs:
+        metadata = doc.metadata
+        source = metadata.get("source", "Unknown file")
+        page = metadata.get("page", "Unknown page")
+        source_info += f"- File: {source}, Page: {page}\n"
+    return f"📄 Sources:\n{source_info.strip()}"
+
+
+class ProgressStreamer:
+    """Collects sources and answer tokens and periodically sends them as MCP progress messages."""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.sources = ""
+        self.tokens = []
+        self._sent = None
+
+    def on_sources(self, docs):
+        self.sources = _format_sources(docs)
+
+    def on_token(self, text):
+        self.tokens.append(text)
+
+    async def flush(self):
+        answer = "".join(self.tokens)
+        message = f"{self.sources}\n\n{answer}" if self.sources else answer
+        if message and message != self._sent:
+            # progress must increase monotonically; the partial answer length does
+            await self.ctx.report_progress(progress=len(message), message=message)
+            self._sent = message
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL_SECONDS)
+            await self.flush()
 
-qa_chain = get_qa_chain()
 
 @mcp.tool()
-async def query_kpi(query: str) -> str:
+async def query_kpi(query: str, ctx: Context) -> str:
     """Extract KPI information from embedded annual reports."""
+    if readiness.status == "failed" or (readiness.status != "ready" and not readiness.corpus_available):
+        return f"[INFO] The RAG agent is not ready yet ({readiness.describe()}). Please try again shortly."
+
+    streamer = ProgressStreamer(ctx)
+    progress_task = asyncio.create_task(streamer.run())
     try:
-        result = qa_chain({"query": query})
+        async with query_slots:
+            result = await asyncio.wait_for(
+                aanswer_question(
+                    query,
+                    use_answer_cache=True,
+                    on_sources=streamer.on_sources,
+                    on_token=streamer.on_token,
+                ),
+                timeout=QUERY_TIMEOUT_SECONDS,
+            )
+        if result.get("cached"):
+            logger.info(f"query_kpi answer cache hit (similarity {result['similarity']:.3f})")
+        logger.info(f"query_kpi timings: {format_timings(result['timings'])}")
         answer = result['answer']
         sources = result.get("source_documents", [])
 
-        source_info = ""
-        for doc in sources:
-            metadata = doc.metadata
-            source = metadata.get("source", "Unknown file")
-            page = metadata.get("page", "Unknown page")
-            source_info += f"- File: {source}, Page: {page}\n"
-
-        return f"{answer}\n\n📄 Sources:\n{source_info.strip()}"
+        note = ""
+        if readiness.status != "ready":
+            note = "\n\n⏳ Document ingestion is still running; newly added reports may not be included yet."
+        return f"{answer}\n\n{_format_sources(sources)}{note}"
+    except asyncio.TimeoutError:
+        logger.warning(f"query_kpi timed out after {QUERY_TIMEOUT_SECONDS:.0f}s: {query!r}")
+        return f"[ERROR] Query timed out after {QUERY_TIMEOUT_SECONDS:.0f} seconds."
     except Exception as e:
         return f"[ERROR] Failed to query documents: {e}"
+    finally:
+        progress_task.cancel()
+
+
+@mcp.tool()
+async def batch_query_kpi(
+    ctx: Context,
+    questions: list[str] | None = None,
+    csv_text: str = "",
+    output_path: str = "",
+) -> str:
+    """
+    Answer many KPI questions in one call. Pass `questions` and/or `csv_text` (CSV with a 'question' column and
+    optional 'id' and 'source' columns). Each result has the answer, its sources and per-question latency.
+    Results are written to `output_path` (.jsonl or .csv, relative to the server's batch output directory)
+    if given, otherwise returned as JSONL.
+    """
+    if readiness.status == "failed" or (readiness.status != "ready" and not readiness.corpus_available):
+        return f"[INFO] The RAG agent is not ready yet ({readiness.describe()}). Please try again shortly."
+    try:
+        items = parse_questions(csv_text, "csv") if csv_text.strip() else []
+        items += parse_questions(json.dumps(questions or []), "json", first_id=len(items) + 1)
+        if not items:
+            return "[ERROR] No questions given."
+        assign_source_filters(items, await asyncio.to_thread(list_pdf_files_from_vector_store))
+
+        async def report(result, done):
+            await ctx.report_progress(progress=done, total=len(items), message=f"{result['id']}: {result['question']}")
+
+        # LLM calls share query_kpi's slots, so a batch cannot exceed the server's quota
+        run = dict(on_result=report, llm_slots=query_slots, timeout=QUERY_TIMEOUT_SECONDS)
+        if output_path:
+            target = resolve_output_path(output_path)
+            with open(target, "w", encoding="utf-8", newline="") as fh:
+                summary = await run_batch(items, ResultWriter(fh, ResultWriter.format_for(target)), **run)
+            return f"Batch complete: {json.dumps(summary)}\nResults written to '{target}'."
+        buffer = io.StringIO()
+        summary = await run_batch(items, ResultWriter(buffer, "jsonl"), **run)
+        logger.info(f"batch_query_kpi: {summary}")
+        return buffer.getvalue()
+    except Exception as e:
+        return f"[ERROR] Batch query failed: {e}"
+
+
+@mcp.tool()
+async def pipeline_metrics(format: str = "prometheus") -> str:
+    """Report ingestion and query metrics (stage timings, tokens, rate-limit sleeps, cache hits) as 'prometheus' text or 'json'."""
+    if format == "json":
+        return json.dumps(metrics.snapshot(), indent=2)
+    return metrics.to_prometheus()
 
 def main():
+    sys.stdout = _PrintsToStderr(sys.stdout)
+    threading.Thread(target=_warm_up, name="rag-warm-up", daemon=True).start()
     mcp.run(transport="stdio")
@@ -0,0 +1,162 @@
+# splitters.py
+#
+# Chunking strategies, selected by SPLITTER_MODE:
+#   recursive  -- character-based RecursiveCharacterTextSplitter (original behaviour)
+#   token      -- the same recursive splitting, sized in tokens
+#   structured -- token-sized, breaks at headings and never inside a table row
+
+import re
+from functools import lru_cache
+
+import numpy as np
+import tiktoken
+from langchain.text_splitter import RecursiveCharacterTextSplitter, TextSplitter
+
+SPLITTER_MODES = ("recursive", "token", "structured")
+
+NUMBER_PATTERN = re.compile(r"\(?[-–+]?\d[\d.,]*%?\)?")
+NUMBERED_HEADING = re.compile(r"^\d+(\.\d+)*\.?\s+\S")
+COLUMN_GAP = re.compile(r"\t|\s{3,}")
+
+
+def classify_line(line):
+    """'row' for table rows, 'heading' for section titles, 'text' otherwise."""
+    stripped = line.strip()
+    words = stripped.split()
+    numbers = NUMBER_PATTERN.findall(stripped)
+    if len(numbers) >= 2 and (len(numbers) * 2 >= len(words) or COLUMN_GAP.search(stripped)):
+        return "row"
+    if (
+        len(words) <= 10
+        and len(stripped) <= 80
+        and not stripped.endswith((".", ",", ";"))
+        and (stripped.isupper() or NUMBERED_HEADING.match(stripped) or stripped.endswith(":")
+             or all(word[:1].isupper() for word in words if word.isalpha()))
+        and any(word.isalpha() for word in words)
+    ):
+        return "heading"
+    return "text"
+
+
+class StructuredTextSplitter(TextSplitter):
+    """
+    Packs whole lines into chunks of at most `chunk_size` tokens.
+
+    A heading starts a new chunk and is repeated at the top of every chunk
+    of its section; tables are cut only between rows, and a table that
+    continues into a new chunk repeats its first (header) row. Prose chunks
+    overlap by up to `chunk_overlap` tokens of whole lines. Line token counts
+    are computed in one batch and chunk boundaries found on their running
+    sum, so a page costs one tokenizer call.
+    """
+
+    def __init__(self, encoding_name="cl100k_base", **kwargs):
+        super().__init__(**kwargs)
+        self._encoding = tiktoken.get_encoding(encoding_name)
+        self._long_line_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            encoding_name=encoding_name, chunk_size=self._chunk_size, chunk_overlap=0, disallowed_special=()
+        )
+
+    def _lines(self, text):
+        lines = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            lines.append(line.rstrip())
+        sizes = [len(tokens) for tokens in self._encoding.encode_batch(lines, disallowed_special=())]
+        # A line longer than a whole chunk (e.g. a page extracted without line breaks) is pre-split
+        if any(size > self._chunk_size for size in sizes):
+            pieces = []
+            for line, size in zip(lines, sizes):
+                pieces.extend(self._long_line_splitter.split_text(line) if size > self._chunk_size else [line])
+            lines = pieces
+            sizes = [len(tokens) for tokens in self._encoding.encode_batch(lines, disallowed_special=())]
+        return lines, np.asarray(sizes, dtype=np.int64)
+
+    def split_text(self, text):
+        lines, sizes = self._lines(text)
+        if not lines:
+            return []
+        kinds = [classify_line(line) for line in lines]
+
+        # Sections run from one heading (or the page start) to the next
+        chunks = []
+        heading = []
+        i = 0
+        while i < len(lines):
+            run_end = i
+            while run_end < len(lines) and kinds[run_end] == "heading":
+                run_end += 1
+            if i < run_end <= i + 2:
+                # One or two heading lines (title + subtitle) head the following section
+                heading = list(range(i, run_end))
+                if run_end == len(lines):
+                    chunks.append(heading)
+                i = run_end
+                continue
+            # Longer runs of title-like lines (e.g. a contents list) are body text
+            end = max(run_end, i + 1)
+            while end < len(lines) and not (kinds[end] == "heading" and kinds[end - 1] != "heading"):
+                end += 1
+            chunks.extend(self._split_section(lines, sizes, kinds, i, end, heading))
+            i = end
+        return ["\n".join(lines[j] for j in chunk) for chunk in chunks]
+
+    def _split_section(self, lines, sizes, kinds, start, end, heading):
+        # table_start[j] is the first row of the table containing line j (-1 outside tables)
+        table_start = []
+        for j in range(start, end):
+            if kinds[j] != "row":
+                table_start.append(-1)
+            elif j > start and kinds[j - 1] == "row":
+                table_start.append(table_start[-1])
+            else:
+                table_start.append(j)
+
+        cum = np.concatenate(([0], np.cumsum(sizes[start:end])))
+        heading_tokens = int(sizes[heading].sum()) if heading else 0
+        chunks = []
+        pos = 0
+        count = end - start
+        while pos < count:
+            prefix = list(heading)
+            first_row = table_start[pos]
+            if first_row not in (-1, start + pos):
+                prefix.append(first_row)  # continued table: repeat its header row
+            budget = max(self._chunk_size - heading_tokens - int(sizes[prefix[len(heading):]].sum()), 1)
+
+            stop = int(np.searchsorted(cum, cum[pos] + budget, side="right")) - 1
+            stop = min(max(stop, pos + 1), count)
+            if stop < count:
+                # Rather than cutting a table that started inside this chunk, end the chunk before it
+                cut_table = table_start[stop]
+                if cut_table != -1 and cut_table > start + pos and table_start[stop - 1] == cut_table:
+                    stop = cut_table - start
+            chunks.append(prefix + list(range(start + pos, start + stop)))
+            if stop >= count:
+                break
+
+            # Prose overlap: carry whole trailing text lines into a chunk that continues the prose
+            back = stop
+            while (back - 1 > pos and kinds[start + stop] == "text" and kinds[start + back - 1] == "text"
+                   and cum[stop] - cum[back - 1] <= self._chunk_overlap):
+                back -= 1
+            pos = back
+        return chunks
+
+
+@lru_cache(maxsize=8)
+def make_splitter(mode="recursive", chunk_size=1000, chunk_overlap=100, encoding_name="cl100k_base"):
+    """Build (and cache per process) the splitter for one set of settings."""
+    if mode == "recursive":
+        return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if mode == "token":
+        # PDF text that happens to read "<|endoftext|>" is counted as plain text, not rejected
+        return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            encoding_name=encoding_name, chunk_size=chunk_size, chunk_overlap=chunk_overlap, disallowed_special=()
+        )
+    if mode == "structured":
+        return StructuredTextSplitter(
+            encoding_name=encoding_name, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+    raise ValueError(f"Unknown splitter mode '{mode}'; expected one of {', '.join(SPLITTER_MODES)}")
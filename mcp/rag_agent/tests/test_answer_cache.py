@@ -0,0 +1,39 @@
+import numpy as np
+
+from answer_cache import SemanticAnswerCache, numeric_terms
+
+
+def _near_duplicates():
+    # Two question vectors with cosine similarity ~0.999, as for "... 2022" vs "... 2023"
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=64)
+    return base, base + rng.normal(scale=0.01, size=64)
+
+
+def test_numeric_terms_normalises_figures_and_periods():
+    assert numeric_terms("EBIT margin FY2022") == {"2022"}
+    assert numeric_terms("Revenue above 1,250.50 in Q3 2023?") == {"1250.5", "q3", "2023"}
+    assert numeric_terms("What was the EBIT margin?") == frozenset()
+
+
+def test_similar_questions_with_different_years_do_not_share_answers():
+    cache = SemanticAnswerCache(threshold=0.95)
+    vector_2022, vector_2023 = _near_duplicates()
+    cache.store(vector_2022, None, 1, {"answer": "12.1%"}, numeric_terms("EBIT margin 2022"))
+
+    value, similarity = cache.lookup(vector_2023, None, 1, numeric_terms("EBIT margin 2023"))
+    assert value is None and similarity == 0.0
+
+    value, similarity = cache.lookup(vector_2023, None, 1, numeric_terms("What was the EBIT margin in 2022?"))
+    assert value == {"answer": "12.1%"}
+    assert similarity >= 0.95
+
+
+def test_filter_and_corpus_version_must_match():
+    cache = SemanticAnswerCache(threshold=0.95)
+    vector, _ = _near_duplicates()
+    cache.store(vector, "report_2022.pdf", 1, {"answer": "a"})
+
+    assert cache.lookup(vector, "other.pdf", 1)[0] is None
+    assert cache.lookup(vector, "report_2022.pdf", 2)[0] is None
+    assert cache.stats()["entries"] == 0  # the version change expired the entry
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from compact_index import CompactVectorStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CompactVectorStore(embedding_function=None, directory=str(tmp_path), rerank_candidates=2)
+
+
+def _add(store, ids, vectors, sources):
+    texts = [f"text {chunk_id}" for chunk_id in ids]
+    store.upsert_embeddings(ids, vectors, texts, [{"source": source} for source in sources])
+
+
+def _nearest(store, vector, k=4, source=None):
+    results = store.similarity_search_with_score_by_vector(vector, k=k, filter={"source": source} if source else None)
+    return [doc.id for doc, _ in results]
+
+
+def test_upsert_replaces_rows(store):
+    _add(store, ["a1", "a2"], [[1, 0, 0], [0, 1, 0]], ["a.pdf", "a.pdf"])
+    _add(store, ["a1"], [[0, 0, 1]], ["a.pdf"])
+
+    assert store.count() == 2
+    assert _nearest(store, [0, 0, 1], k=1) == ["a1"]
+    # The replaced vector is tombstoned, so a1 is not found at its old position too
+    assert _nearest(store, [1, 0, 0]) == ["a2", "a1"]
+    (doc,) = store.get_documents(["a1"])
+    assert doc.metadata == {"source": "a.pdf"}
+
+
+def test_compaction_keeps_ids_on_their_rows(store):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(20, 8))
+    ids = [f"c{i}" for i in range(20)]
+    _add(store, ids, vectors, ["a.pdf"] * 20)
+
+    store.delete(ids[::2])
+    store.finish_ingestion()
+    assert store.rows == 10
+
+    # After rows move down, each remaining ID still finds its own vector with distance ~0
+    for chunk_id, vector in zip(ids[1::2], vectors[1::2]):
+        (doc, distance), = store.similarity_search_with_score_by_vector(vector, k=1)
+        assert doc.id == chunk_id
+        assert distance == pytest.approx(0, abs=1e-5)
+    assert sorted(store.ids_for_source("a.pdf")) == sorted(ids[1::2])
+
+    # Appends after compaction continue after the last kept row, and a reopened store agrees
+    _add(store, ["new"], [[1] * 8], ["b.pdf"])
+    reopened = CompactVectorStore(embedding_function=None, directory=store.directory)
+    assert reopened.rows == 11
+    assert _nearest(reopened, [1] * 8, k=1) == ["new"]
+    assert _nearest(reopened, vectors[3], k=1) == ["c3"]
+
+
+def test_filtered_search_returns_k_results(store):
+    # Rows of a.pdf are all nearer to the query than any row of b.pdf
+    _add(store, [f"a{i}" for i in range(10)], [[1, 0.01 * i, 0] for i in range(10)], ["a.pdf"] * 10)
+    _add(store, ["b1", "b2", "b3", "b4"], [[0, 1, 0], [0.1, 1, 0], [0.2, 1, 0], [0.3, 1, 0]], ["b.pdf"] * 4)
+
+    assert _nearest(store, [1, 0, 0], k=3, source="b.pdf") == ["b4", "b3", "b2"]
+    assert _nearest(store, [1, 0, 0], k=3, source="missing.pdf") == []
+    assert len(_nearest(store, [1, 0, 0], k=20)) == 14
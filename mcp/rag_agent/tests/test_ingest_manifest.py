@@ -0,0 +1,15 @@
+import json
+
+from ingest_manifest import IngestManifest, make_chunk_id
+
+
+def test_chunk_ids_are_per_file():
+    same = ("0" * 64, 0, "EBIT margin 12.1%")
+    assert make_chunk_id("report.pdf", *same) == make_chunk_id("report.pdf", *same)
+    assert make_chunk_id("report.pdf", *same) != make_chunk_id("report (1).pdf", *same)
+
+
+def test_version_1_manifest_is_reingested(tmp_path):
+    path = tmp_path / "ingest_manifest.json"
+    path.write_text(json.dumps({"version": 1, "splitter": {}, "files": {"report.pdf": {"hash": "x"}}}))
+    assert IngestManifest(str(path)).files == {}
@@ -0,0 +1,50 @@
+import math
+
+import pytest
+
+from keyword_index import BM25Index
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(str(tmp_path / "keyword_index.sqlite3"))
+    texts = {
+        "a1": "revenue grew in 2022 and the margin improved",
+        "a2": "the margin of the group",
+        "b1": "revenue revenue 2022 outlook",
+        "b2": "the group and the outlook",
+    }
+    index.add(list(texts), list(texts.values()), [{"source": f"{i[0]}.pdf"} for i in texts])
+    return index
+
+
+def test_scores_match_bm25(index):
+    (chunk_id, score), = index.search("ebitda outlook 2022 revenue", k=1)
+    assert chunk_id == "b1"
+
+    # total_docs 4, average length 5.5; "revenue" and "2022" each occur in 2 chunks
+    idf = math.log(1 + (4 - 2 + 0.5) / (2 + 0.5))
+    norm = 1 - 0.75 + 0.75 * 4 / 5.5
+
+    def term(tf):
+        return idf * tf * 2.5 / (tf + 1.5 * norm)
+
+    assert score == pytest.approx(term(2) + term(1) + term(1))
+
+
+def test_stopwords_and_common_terms_are_skipped(index):
+    assert index.search("the and of") == []
+    assert [i for i, _ in index.search("the revenue", k=4)] == ["b1", "a1"]
+
+    # "margin" is in half of the chunks: skipped next to a rarer term, kept when it is the only one
+    index.max_df_ratio = 0.25
+    assert [i for i, _ in index.search("margin improved")] == ["a1"]
+    assert {i for i, _ in index.search("margin")} == {"a1", "a2"}
+
+
+def test_source_filter_and_limit(index):
+    assert [i for i, _ in index.search("revenue outlook", k=1)] == ["b1"]
+    assert [i for i, _ in index.search("revenue outlook", source="a.pdf")] == ["a1"]
+
+    index.delete(["b1"])
+    assert [i for i, _ in index.search("revenue outlook")] == ["b2", "a1"]
@@ -0,0 +1,72 @@
+import pytest
+import tiktoken
+import tiktoken.registry
+
+from splitters import StructuredTextSplitter, classify_line, make_splitter
+
+HEADING = "INCOME STATEMENT"
+HEADER_ROW = "Item   2022   2023"
+ROWS = [f"Line item {i}   {1000 + i:,}   {2000 + i:,}" for i in range(30)]
+
+
+@pytest.fixture(autouse=True)
+def byte_encoding(monkeypatch):
+    # One token per byte, so tests need no downloaded encoding and sizes are easy to reason about
+    encoding = tiktoken.Encoding(
+        "test_bytes", pat_str=r"\S+|\s+", mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={"<|endoftext|>": 256},
+    )
+    monkeypatch.setitem(tiktoken.registry.ENCODINGS, "test_bytes", encoding)
+
+
+def _splitter(chunk_size, chunk_overlap=0):
+    return StructuredTextSplitter(encoding_name="test_bytes", chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def test_line_kinds():
+    assert classify_line(HEADING) == "heading"
+    assert classify_line(HEADER_ROW) == "row"
+    assert all(classify_line(row) == "row" for row in ROWS)
+    assert classify_line("Revenue grew strongly in all regions.") == "text"
+
+
+def test_table_is_split_between_rows_and_repeats_its_header():
+    text = "\n".join([HEADING, HEADER_ROW, *ROWS])
+    chunks = [chunk.split("\n") for chunk in _splitter(200).split_text(text)]
+
+    assert len(chunks) > 2
+    for lines in chunks:
+        assert lines[:2] == [HEADING, HEADER_ROW]
+        assert set(lines[2:]) <= set(ROWS)
+        assert sum(len(line) for line in lines) <= 200
+    # Every row lands in exactly one chunk, in order
+    assert [line for lines in chunks for line in lines[2:]] == ROWS
+
+
+def test_table_starting_mid_chunk_moves_to_the_next_chunk():
+    prose = "Revenue grew strongly in all regions."
+    table = [HEADER_ROW, *ROWS[:3]]
+    # The table fits in a chunk of its own, but not after the prose
+    chunks = _splitter(120).split_text("\n".join([prose, *table]))
+    assert chunks == [prose, "\n".join(table)]
+
+
+def test_long_lines_make_progress():
+    # A page extracted without line breaks is pre-split instead of becoming one oversized chunk
+    line = " ".join(["net sales rose while operating costs fell"] * 200)
+    chunks = _splitter(100).split_text(line)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert " ".join(chunks).split() == line.split()
+
+    # Heading and repeated header row alone exceed the budget: each chunk still takes one new line
+    text = "\n".join([HEADING, HEADER_ROW, *ROWS[:5]])
+    chunks = [chunk.split("\n") for chunk in _splitter(30).split_text(text)]
+    assert chunks[0] == [HEADING, HEADER_ROW]
+    assert [lines[2:] for lines in chunks[1:]] == [[row] for row in ROWS[:5]]
+
+
+def test_special_token_text_is_plain_text():
+    line = "<|endoftext|> " * 50
+    assert " ".join(_splitter(40).split_text(line)).split() == line.split()
+    assert make_splitter("token", 40, 0, "test_bytes").split_text(line)
@@ -0,0 +1,359 @@
+# vector_stores.py
+#
+# Vector store backends behind one interface, selected by VECTOR_STORE:
+#   chroma   -- local Chroma directory (single process)
+#   pgvector -- shared Postgres/pgvector database, so several server
+#               replicas can serve queries from one store
+#
+# Both are LangChain VectorStores (similarity_search / as_retriever) with the
+# extra bulk operations ingestion needs.
+
+import json
+import re
+import threading
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+
+class RAGVectorStore(VectorStore):
+    """Operations used by ingestion and retrieval on top of LangChain's VectorStore."""
+
+    def upsert_embeddings(self, ids, embeddings, texts, metadatas):
+        """Insert or replace chunks with precomputed embeddings."""
+        raise NotImplementedError
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        raise NotImplementedError
+
+    def ids_for_source(self, source):
+        raise NotImplementedError
+
+    def get_documents(self, ids):
+        """Documents for `ids`, in no particular order; unknown IDs are skipped."""
+        raise NotImplementedError
+
+    def iter_chunks(self, page_size=1000, include_text=True) -> Iterator[tuple]:
+        """Yield (ids, texts, metadatas) pages over the whole store; texts is None without `include_text`."""
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def finish_ingestion(self):
+        """Hook run after a bulk load (e.g. to build indexes)."""
+
+    def corpus_version(self):
+        """A value that changes with every write, for stores shared between processes; None otherwise."""
+        return None
+
+    def page_counts(self):
+        """{source: distinct pages} computed by the store itself, or None to page through iter_chunks()."""
+        return None
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Create the store directly and ingest with upsert_embeddings().")
+
+
+# === Chroma ===
+class ChromaVectorStore(RAGVectorStore):
+    """Local Chroma directory; the original backend."""
+
+    def __init__(self, embedding_function: Embeddings, persist_directory: str):
+        from langchain_chroma import Chroma
+
+        self.chroma = Chroma(embedding_function=embedding_function, persist_directory=persist_directory)
+
+    @property
+    def embeddings(self):
+        return self.chroma.embeddings
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return self.chroma.similarity_search(query, k=k, **kwargs)
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.chroma.similarity_search_with_score(query, k=k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return self.chroma.similarity_search_by_vector(embedding, k=k, **kwargs)
+
+    def _select_relevance_score_fn(self):
+        return self.chroma._select_relevance_score_fn()
+
+    def upsert_embeddings(self, ids, embeddings, texts, metadatas):
+        self.chroma._collection.upsert(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+
+    def delete(self, ids=None, **kwargs):
+        if ids:
+            self.chroma.delete(ids=list(ids))
+        return True
+
+    def ids_for_source(self, source):
+        return self.chroma.get(where={"source": source}, include=[])["ids"]
+
+    def get_documents(self, ids):
+        fetched = self.chroma.get(ids=list(ids), include=["documents", "metadatas"])
+        return [
+            Document(id=chunk_id, page_content=text, metadata=metadata or {})
+            for chunk_id, text, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"])
+        ]
+
+    def iter_chunks(self, page_size=1000, include_text=True):
+        include = ["documents", "metadatas"] if include_text else ["metadatas"]
+        offset = 0
+        while True:
+            page = self.chroma.get(include=include, limit=page_size, offset=offset)
+            if not page["ids"]:
+                return
+            offset += len(page["ids"])
+            yield page["ids"], page["documents"] if include_text else None, page["metadatas"]
+
+    def count(self):
+        return self.chroma._collection.count()
+
+
+# === Postgres / pgvector ===
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _vector_literal(vector):
+    return "[" + ",".join(repr(float(x)) for x in vector) + "]"
+
+
+def _clean_text(text):
+    # Postgres text cannot hold NUL bytes, which some PDFs produce
+    return text.replace("\x00", "")
+
+
+class PgVectorStore(RAGVectorStore):
+    """
+    Chunks in one Postgres table with a pgvector column, shared by all replicas.
+
+    Connections come from a psycopg pool. Ingestion streams each batch into
+    a temporary table with COPY and upserts from there in one statement.
+    The table is created on the first write, once the embedding dimension
+    is known, with an HNSW index (or IVFFlat, built after the first bulk
+    load) using cosine distance. `source` is a column so per-file filters
+    and deletes use a B-tree index.
+    """
+
+    def __init__(self, embedding_function: Embeddings, dsn: str, table="rag_chunks", index_type="hnsw",
+                 min_connections=1, max_connections=10, hnsw_m=16, hnsw_ef_construction=64, ef_search=100):
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as e:
+            raise ImportError(
+                "VECTOR_STORE=pgvector needs psycopg 3 with its pool: install the 'pgvector' extra "
+                "(pip install '.[pgvector]') or 'psycopg[binary,pool]'"
+            ) from e
+        if not _IDENTIFIER.match(table):
+            raise ValueError(f"Invalid PGVECTOR_TABLE name '{table}'")
+        if index_type not in ("hnsw", "ivfflat", "none"):
+            raise ValueError(f"Unknown PGVECTOR_INDEX '{index_type}'; expected hnsw, ivfflat or none")
+
+        self.embedding_function = embedding_function
+        self.table = table
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.ef_search = ef_search
+        self.pool = ConnectionPool(dsn, min_size=min_connections, max_size=max_connections, open=True)
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    # === Schema ===
+    def _table_exists(self, cur):
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (self.table,))
+        return cur.fetchone()[0]
+
+    def _ensure_schema(self, dimension):
+        if self._schema_ready:
+            return
+        with self._schema_lock, self.pool.connection() as conn, conn.cursor() as cur:
+            if self._schema_ready:
+                return
+            cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            cur.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                " id TEXT PRIMARY KEY,"
+                " source TEXT,"
+                " document TEXT NOT NULL,"
+                " metadata JSONB NOT NULL,"
+                f" embedding vector({int(dimension)}) NOT NULL)"
+            )
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_source_idx ON {self.table} (source)")
+            if self.index_type == "hnsw":
+                cur.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_embedding_hnsw ON {self.table}"
+                    f" USING hnsw (embedding vector_cosine_ops)"
+                    f" WITH (m = {int(self.hnsw_m)}, ef_construction = {int(self.hnsw_ef_construction)})"
+                )
+            self._schema_ready = True
+
+    def finish_ingestion(self):
+        # IVFFlat clusters are trained on existing rows, so it is built after the first bulk load
+        if self.index_type != "ivfflat":
+            return
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            if not self._table_exists(cur):
+                return
+            cur.execute(f"SELECT COUNT(*) FROM {self.table}")
+            rows = cur.fetchone()[0]
+            if rows:
+                lists = max(10, int(rows ** 0.5))
+                cur.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_embedding_ivfflat ON {self.table}"
+                    f" USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})"
+                )
+
+    # === Writes ===
+    def upsert_embeddings(self, ids, embeddings, texts, metadatas):
+        if not ids:
+            return
+        self._ensure_schema(len(embeddings[0]))
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {self.table}_staging"
+                f" (LIKE {self.table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            with cur.copy(
+                f"COPY {self.table}_staging (id, source, document, metadata, embedding) FROM STDIN"
+            ) as copy:
+                for chunk_id, vector, text, metadata in zip(ids, embeddings, texts, metadatas):
+                    metadata = metadata or {}
+                    copy.write_row((
+                        chunk_id,
+                        metadata.get("source"),
+                        _clean_text(text),
+                        _clean_text(json.dumps(metadata, default=str)),
+                        _vector_literal(vector),
+                    ))
+            cur.execute(
+                f"INSERT INTO {self.table} (id, source, document, metadata, embedding)"
+                f" SELECT DISTINCT ON (id) id, source, document, metadata, embedding FROM {self.table}_staging"
+                " ON CONFLICT (id) DO UPDATE SET source = EXCLUDED.source, document = EXCLUDED.document,"
+                " metadata = EXCLUDED.metadata, embedding = EXCLUDED.embedding"
+            )
+            self._bump_version(cur)
+
+    def delete(self, ids=None, **kwargs):
+        if not ids:
+            return True
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            if self._table_exists(cur):
+                cur.execute(f"DELETE FROM {self.table} WHERE id = ANY(%s)", (list(ids),))
+                if cur.rowcount:
+                    self._bump_version(cur)
+        return True
+
+    def _bump_version(self, cur):
+        # Every replica reads this to invalidate its answer cache when any of them writes
+        cur.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table}_meta"
+            " (id INTEGER PRIMARY KEY CHECK (id = 0), version BIGINT NOT NULL)"
+        )
+        cur.execute(
+            f"INSERT INTO {self.table}_meta AS m (id, version) VALUES (0, 1)"
+            " ON CONFLICT (id) DO UPDATE SET version = m.version + 1"
+        )
+
+    def corpus_version(self):
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL", (f"{self.table}_meta",))
+            if not cur.fetchone()[0]:
+                return 0
+            cur.execute(f"SELECT version FROM {self.table}_meta")
+            row = cur.fetchone()
+            return row[0] if row else 0
+
+    # === Reads ===
+    def _rows(self, sql, params):
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            if not self._table_exists(cur):
+                return []
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+    def ids_for_source(self, source):
+        return [row[0] for row in self._rows(f"SELECT id FROM {self.table} WHERE source = %s", (source,))]
+
+    def get_documents(self, ids):
+        rows = self._rows(
+            f"SELECT id, document, metadata FROM {self.table} WHERE id = ANY(%s)", (list(ids),)
+        )
+        return [Document(id=chunk_id, page_content=text, metadata=metadata) for chunk_id, text, metadata in rows]
+
+    def iter_chunks(self, page_size=1000, include_text=True):
+        columns = "id, document, metadata" if include_text else "id, NULL, metadata"
+        last_id = ""
+        while True:
+            rows = self._rows(
+                f"SELECT {columns} FROM {self.table} WHERE id > %s ORDER BY id LIMIT %s", (last_id, page_size)
+            )
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [r[0] for r in rows], [r[1] for r in rows] if include_text else None, [r[2] for r in rows]
+
+    def count(self):
+        rows = self._rows(f"SELECT COUNT(*) FROM {self.table}", ())
+        return rows[0][0] if rows else 0
+
+    def page_counts(self):
+        rows = self._rows(
+            f"SELECT source, COUNT(DISTINCT metadata->>'page') FROM {self.table}"
+            " WHERE source IS NOT NULL AND metadata ? 'page' GROUP BY source",
+            (),
+        )
+        return dict(rows)
+
+    # === Search ===
+    def _filter_clause(self, filter):
+        clauses, params = [], []
+        for key, value in (filter or {}).items():
+            if key == "source":
+                clauses.append("source = %s")
+                params.append(value)
+            else:
+                clauses.append("metadata @> %s::jsonb")
+                params.append(json.dumps({key: value}))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        """(Document, cosine distance) pairs, nearest first."""
+        where, params = self._filter_clause(filter)
+        vector = _vector_literal(embedding)
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            if not self._table_exists(cur):
+                return []
+            # Filtered HNSW scans need a wider candidate list to still return k rows
+            cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(max(self.ef_search, k)),))
+            cur.execute(
+                f"SELECT id, document, metadata, embedding <=> %s::vector AS distance FROM {self.table}"
+                f"{where} ORDER BY embedding <=> %s::vector LIMIT %s",
+                [vector] + params + [vector, k],
+            )
+            rows = cur.fetchall()
+        return [
+            (Document(id=chunk_id, page_content=text, metadata=metadata), distance)
+            for chunk_id, text, metadata, distance in rows
+        ]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k, filter)
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k, filter)
+
+    def _select_relevance_score_fn(self):
+        return self._cosine_relevance_score_fn
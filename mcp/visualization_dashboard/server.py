@@ -1,9 +1,12 @@
+import asyncio
 import logging
+import threading
 import traceback
-import pandas as pd
+from contextlib import asynccontextmanager
 from mcp.server.fastmcp import FastMCP
-from visualize.dashboard import build_dashboard
-from io import StringIO
+from visualize.config import get_visualization_config
+from visualize.dashboard import build_dashboard, get_render_executor, warm_up_render_executor
+from visualize.datasets import load_dataset
 from typing import Any
 
 # === Logging Configuration ===
@@ -14,27 +17,77 @@ logger = logging.getLogger("visualization.server")
 mcp = FastMCP("visualization")
 
 
+# === Dashboard job queue ===
+class DashboardBusy(RuntimeError):
+    pass
+
+
+class DashboardJobs:
+    """
+    Bounded queue of dashboard builds: `parallel` run at once (each off the
+    event loop), up to `queued` more wait for a slot, and requests beyond
+    that are refused straight away instead of piling up.
+    """
+
+    def __init__(self, parallel: int, queued: int):
+        self.limit = parallel + queued
+        self.admitted = 0
+        self._slots = asyncio.Semaphore(parallel)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.admitted >= self.limit:
+            raise DashboardBusy(f"The dashboard server is busy ({self.admitted} dashboards in progress); try again shortly.")
+        self.admitted += 1
+        try:
+            async with self._slots:
+                yield
+        finally:
+            self.admitted -= 1
+
+
+_render_config = get_visualization_config().render
+dashboard_jobs = DashboardJobs(_render_config.max_parallel_jobs, _render_config.max_queued_jobs)
+
+
+def _warm_up():
+    # Runs beside the stdio handshake; a dashboard requested meanwhile just queues on the same pool
+    try:
+        warm_up_render_executor()
+        logger.info("Render workers ready")
+    except Exception as e:
+        logger.warning("Render worker warm-up failed: %s", e)
+
+
+def _generate(data: str, path: str, dataset: str):
+    dataframe, digest = load_dataset(data=data, path=path, dataset=dataset)
+    dashboard_html, chart_htmls = build_dashboard(dataframe, get_render_executor())
+    return dashboard_html, chart_htmls, digest
 
-def _load_csv_into_df(data:str) -> Any:
-    """ Load csv data presented as a string into a pandas dataframe"""
-    input_data = StringIO()
-    input_data.write(data)
-    input_data.seek(0)
-    return pd.read_csv(input_data)
 
 # === MCP Tool: Dashboard Generator ===
 @mcp.tool()
-async def generate_dashboard(data: str) -> Any:
-    """Create a visualization of data. 
-    Args:
-        data: The data that should be visualized. Has to be provided as
-              a comma-separated csv file.
+async def generate_dashboard(data: str = "", path: str = "", dataset: str = "") -> Any:
+    """Create a visualization of portfolio data. Provide exactly one of:
+        path: A .csv, .parquet or .feather file in the uploads folder, e.g.
+              'historic_portfolio.csv'. Preferred: the data is read by the
+              server and never has to be sent in the request.
+        dataset: The dataset hash reported by an earlier call.
+        data: The data itself as a comma-separated csv string (small
+              datasets only).
     """
     try:
-        dataframe = _load_csv_into_df(data)
-        dashboard_html, chart_htmls = build_dashboard(dataframe)
-        success_message = "<p style='color:green;'>Dashboard generated successfully.</p>" 
+        # Loading and rendering run in a worker thread, so the event loop keeps serving other clients
+        async with dashboard_jobs.slot():
+            dashboard_html, chart_htmls, digest = await asyncio.to_thread(_generate, data, path, dataset)
+        success_message = (
+            "<p style='color:green;'>Dashboard generated successfully. "
+            f"Dataset hash: {digest} (pass it as 'dataset' to reuse this data).</p>"
+        )
         return dashboard_html, chart_htmls, success_message
+    except DashboardBusy as e:
+        logger.warning("Dashboard request refused: %s", e)
+        return f"<html><body><h1>Fehler</h1><p>{str(e)}</p></body></html>"
     except Exception as e:
         logger.error("Dashboard generation failed: %s\n%s", e, traceback.format_exc())
         return f"<html><body><h1>Fehler</h1><p>{str(e)}</p></body></html>"
@@ -42,4 +95,5 @@ async def generate_dashboard(data: str) -> Any:
 # === Entry Point ===
 if __name__ == "__main__":
     logger.info("Starting Visualization MCP Server...")
+    threading.Thread(target=_warm_up, name="render-warm-up", daemon=True).start()
     mcp.run(transport="stdio")
@@ -1,4 +1,5 @@
 # config.py
+import os
 from pathlib import Path
 from typing import Literal, Optional
 from pydantic import Field
@@ -27,12 +28,44 @@ class SamplingConfig(BaseSettings):
     method: Literal["random", "systematic", "stratified"] = "random"
 
 
+class DatasetConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="DASHBOARD_")
+
+    # Files passed to generate_dashboard by path must live under data_root
+    data_root: Path = PROJECT_ROOT.parents[1] / "uploads"
+    # Datasets stored by content hash; defaults to <data_root>/.datasets
+    store_dir: Optional[Path] = None
+    # In-process LRU of parsed, normalised frames
+    cache_max_entries: int = 8
+    cache_max_mb: int = 512
+    # Also spill each new dataset to the store (Parquet when pyarrow is installed),
+    # so hash references and restarts skip CSV parsing
+    spill_to_disk: bool = True
+
+    def resolved_store_dir(self) -> Path:
+        return self.store_dir or self.data_root / ".datasets"
+
+
+class RenderConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="DASHBOARD_")
+
+    # Charts of one dashboard are built and serialised concurrently in this many workers (1 = inline)
+    render_workers: int = Field(default_factory=lambda: min(4, os.cpu_count() or 1))
+    # Processes sidestep the GIL for figure building and to_html; threads avoid worker start-up
+    render_in_processes: bool = True
+    # Dashboards built at once, and requests allowed to wait behind them before new ones are refused
+    max_parallel_jobs: int = 2
+    max_queued_jobs: int = 8
+
+
 class VisualizationConfig(BaseSettings):
     default_theme: str = "plotly_white"
     figure_size: FigureSizeConfig = FigureSizeConfig()
     chart_defaults: ChartDefaults = ChartDefaults()
     sampling: SamplingConfig = SamplingConfig()
     max_rows_for_charts: int = 100000
+    datasets: DatasetConfig = DatasetConfig()
+    render: RenderConfig = RenderConfig()
 
 
 class Settings(BaseSettings):
@@ -1,15 +1,64 @@
 import pandas as pd
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import StringIO
-from typing import Tuple, Dict
-from .dashboard_chart_generator import generate_all_charts
+from typing import Optional, Tuple, Dict
+from .config import get_visualization_config
+from .dashboard_chart_generator import generate_all_charts, warm_up
 import json
 
 DASHBOARD_TITLE = "Showcase Multi Agent Portfolio Analytics"
 COPYRIGHT_NOTICE = "&copy; 2025 Portfolio Dashboard"
 
+_render_executor: Optional[Executor] = None
+_render_executor_lock = threading.Lock()
 
-def build_dashboard(df: pd.DataFrame) -> Tuple[str, Dict[str, str]]:
-    chart_htmls = generate_all_charts(df)
+
+def get_render_executor() -> Optional[Executor]:
+    """Shared pool the charts are rendered in (see RenderConfig); None renders inline."""
+    global _render_executor
+    config = get_visualization_config().render
+    if config.render_workers <= 1:
+        return None
+    with _render_executor_lock:
+        if _render_executor is None:
+            if config.render_in_processes:
+                # spawn: forking the multi-threaded server process is not safe
+                _render_executor = ProcessPoolExecutor(
+                    max_workers=config.render_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                _render_executor = ThreadPoolExecutor(
+                    max_workers=config.render_workers, thread_name_prefix="chart-render"
+                )
+        return _render_executor
+
+
+def _discard_render_executor(executor: Executor) -> None:
+    global _render_executor
+    with _render_executor_lock:
+        if _render_executor is executor:
+            _render_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def warm_up_render_executor() -> None:
+    """Start the render workers (and their plotly imports) ahead of the first dashboard."""
+    executor = get_render_executor()
+    if executor is not None:
+        for future in [executor.submit(warm_up) for _ in range(get_visualization_config().render.render_workers)]:
+            future.result()
+
+
+def build_dashboard(df: pd.DataFrame, executor: Optional[Executor] = None) -> Tuple[str, Dict[str, str]]:
+    try:
+        chart_htmls = generate_all_charts(df, executor)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool for later dashboards
+        _discard_render_executor(executor)
+        raise
 
     try:
         dashboard_html = _render_dashboard_html_iframes(
@@ -1,10 +1,61 @@
 import pandas as pd
 import plotly.graph_objects as go
-from typing import Dict
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+from .portfolio_analytics import performance_vs_benchmark
 
 
-def generate_performance_chart(df: pd.DataFrame) -> str:
-    df.columns = df.columns.str.strip()
+@dataclass(frozen=True)
+class ChartInputs:
+    """
+    Views of the portfolio data shared by all chart generators, built once
+    by `prepare_chart_inputs`. Generators only read from them; the caller's
+    DataFrame is never modified.
+    """
+    frame: pd.DataFrame       # all rows, stripped column names, datetime Date
+    holdings: pd.DataFrame    # rows with Sector != "Benchmark"
+    benchmark: pd.DataFrame   # rows with Sector == "Benchmark"
+    latest_date: pd.Timestamp  # latest Date among the holdings
+    latest: pd.DataFrame      # holdings on latest_date
+    year: pd.Series           # Date.dt.year of the holdings, aligned with `holdings`
+
+
+def prepare_chart_inputs(df: pd.DataFrame) -> ChartInputs:
+    """Validate and normalise once: strip columns, parse Date and split benchmark/holdings/latest."""
+    frame = df
+    if any(col != col.strip() for col in frame.columns):
+        frame = frame.rename(columns=str.strip)
+
+    missing = [col for col in ("Date", "Sector") if col not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns in DataFrame: {missing}")
+    if not pd.api.types.is_datetime64_any_dtype(frame["Date"]):
+        frame = frame.assign(Date=pd.to_datetime(frame["Date"]))
+
+    is_benchmark = (frame["Sector"] == "Benchmark").to_numpy()
+    holdings = frame[~is_benchmark]
+    latest_date = holdings["Date"].max()
+    return ChartInputs(
+        frame=frame,
+        holdings=holdings,
+        benchmark=frame[is_benchmark],
+        latest_date=latest_date,
+        latest=holdings[(holdings["Date"] == latest_date).to_numpy()],
+        year=holdings["Date"].dt.year,
+    )
+
+
+def _as_inputs(data: Union[ChartInputs, pd.DataFrame]) -> ChartInputs:
+    return data if isinstance(data, ChartInputs) else prepare_chart_inputs(data)
+
+
+def generate_performance_chart(data: Union[ChartInputs, pd.DataFrame]) -> str:
+    return render_performance_chart(performance_chart_data(_as_inputs(data)))
+
+
+def performance_chart_data(inputs: ChartInputs) -> pd.DataFrame:
+    df = inputs.frame
 
     required_cols = ['Date', 'Performance (%)', 'Weight (%)', 'Sector']
     missing = [col for col in required_cols if col not in df.columns]
@@ -14,28 +65,15 @@ def generate_performance_chart(df: pd.DataFrame) -> str:
     # Remove 'Ticker' from required_cols as it is not used in this function
     # and will prevent errors if the 'Ticker' column is not in the data.
 
-    def weighted_perf(x):
-        weights_sum = x['Weight (%)'].sum()
-        if weights_sum == 0:
-            return float('nan')
-        return (x['Performance (%)'] * x['Weight (%)']).sum() / weights_sum
-
-    # Portfolio: weighted average performance per date
-    portfolio_grouped = df.groupby('Date').apply(weighted_perf).reset_index(name='Weighted_Performance').sort_values('Date')
-
-    # Benchmark: mean performance per date
-    bench_df = df[df['Sector'] == 'Benchmark']
-    if bench_df.empty:
+    if inputs.benchmark.empty:
         raise ValueError("No benchmark data found for 'Sector' == 'Benchmark'")
 
-    bench_grouped = bench_df.groupby('Date')['Performance (%)'].mean().reset_index().sort_values('Date')
-    bench_grouped.rename(columns={'Performance (%)': 'Performance_Benchmark'}, inplace=True)
+    # Portfolio: weighted average performance per date (grouped sums, see portfolio_analytics);
+    # benchmark: mean performance per date; plus their difference for IBCS highlighting
+    return performance_vs_benchmark(df, inputs.benchmark)
 
-    merged = pd.merge(portfolio_grouped, bench_grouped, on='Date', how='outer').sort_values('Date')
-    
-    # Calculate difference for IBCS highlighting
-    merged['Difference'] = merged['Weighted_Performance'] - merged['Performance_Benchmark']
-    
+
+def render_performance_chart(merged: pd.DataFrame) -> str:
     # Plotting based on IBCS principles
     fig = go.Figure()
 
@@ -111,18 +149,17 @@ def generate_performance_chart(df: pd.DataFrame) -> str:
     return fig.to_html(full_html=False, include_plotlyjs="cdn")
 
 
-def generate_top_positions_chart(df: pd.DataFrame) -> str:
-    df.columns = df.columns.str.strip()
+def generate_top_positions_chart(data: Union[ChartInputs, pd.DataFrame]) -> str:
+    return render_top_positions_chart(top_positions_chart_data(_as_inputs(data)))
 
-    df = df[df["Sector"] != "Benchmark"]
 
+def top_positions_chart_data(inputs: ChartInputs) -> pd.Series:
     required_cols = ["Market Value", "Ticker", "Date"]
-    missing = [col for col in required_cols if col not in df.columns]
+    missing = [col for col in required_cols if col not in inputs.frame.columns]
     if missing:
         raise ValueError(f"Missing columns in DataFrame: {missing}")
 
-    latest_date = df["Date"].max()
-    df_latest = df[df["Date"] == latest_date]
+    df_latest = inputs.latest
 
     if df_latest.empty:
         raise ValueError("No data found for the latest date.")
@@ -130,8 +167,10 @@ def generate_top_positions_chart(df: pd.DataFrame) -> str:
     unique_positions = df_latest["Ticker"].nunique()
     top_n = min(unique_positions, 10)
 
-    top_positions = df_latest.groupby("Ticker")["Market Value"].sum().nlargest(top_n)
+    return df_latest.groupby("Ticker", observed=True)["Market Value"].sum().nlargest(top_n)
 
+
+def render_top_positions_chart(top_positions: pd.Series) -> str:
     # Use a solid color (e.g., black) for bars and add data labels.
     fig = go.Figure(go.Bar(
         x=top_positions.values,
@@ -154,24 +193,24 @@ def generate_top_positions_chart(df: pd.DataFrame) -> str:
     return fig.to_html(full_html=False, include_plotlyjs="cdn")
 
 
-def generate_drawdown_chart(df: pd.DataFrame) -> str:
-    df.columns = df.columns.str.strip()
-    df = df[df["Sector"] != "Benchmark"]
+def generate_drawdown_chart(data: Union[ChartInputs, pd.DataFrame]) -> str:
+    return render_drawdown_chart(drawdown_chart_data(_as_inputs(data)))
+
 
+def drawdown_chart_data(inputs: ChartInputs) -> pd.DataFrame:
     required_cols = ["Drawdown (%)", "Date"]
-    missing = [col for col in required_cols if col not in df.columns]
+    missing = [col for col in required_cols if col not in inputs.frame.columns]
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
 
-    # Ensure "Date" is datetime type
-    df["Date"] = pd.to_datetime(df["Date"])
-
-    # Extract year from date
-    df["Year"] = df["Date"].dt.year
+    # Group by year (precomputed from the parsed Date) and calculate mean drawdown
+    return (
+        inputs.holdings["Drawdown (%)"].groupby(inputs.year.rename("Year")).mean()
+        .reset_index().sort_values("Year")
+    )
 
-    # Group by year and calculate mean drawdown
-    grouped = df.groupby("Year")["Drawdown (%)"].mean().reset_index().sort_values("Year")
 
+def render_drawdown_chart(grouped: pd.DataFrame) -> str:
     fig = go.Figure()
     fig.add_trace(go.Bar(
         x=grouped["Year"].astype(str),  # convert years to string for better x-axis labels
@@ -203,47 +242,47 @@ def generate_drawdown_chart(df: pd.DataFrame) -> str:
 
 
 
-def generate_allocation_chart(df: pd.DataFrame) -> str:
-    df.columns = df.columns.str.strip()
+def generate_allocation_chart(data: Union[ChartInputs, pd.DataFrame]) -> str:
+    return render_allocation_chart(allocation_chart_data(_as_inputs(data)))
 
-    df = df[df["Sector"] != "Benchmark"]
 
+def allocation_chart_data(inputs: ChartInputs) -> Dict[str, list]:
     required_columns = {"Allocation (%)", "Ticker", "Asset Class", "Date"}
-    if not required_columns.issubset(df.columns):
+    if not required_columns.issubset(inputs.frame.columns):
         raise ValueError("Missing required columns: 'Allocation (%)', 'Ticker', 'Asset Class', or 'Date'")
 
-    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
-        df["Date"] = pd.to_datetime(df["Date"])
-
-    latest_date = df["Date"].max()
-    df_latest = df[df["Date"] == latest_date]
+    df_latest = inputs.latest
 
     if df_latest.empty:
         raise ValueError("No data found for the latest date.")
 
-    grouped = df_latest.groupby(["Asset Class", "Ticker"])["Allocation (%)"].sum().reset_index()
-    category_sums = grouped.groupby("Asset Class")["Allocation (%)"].sum().reset_index()
+    grouped = df_latest.groupby(["Asset Class", "Ticker"], observed=True)["Allocation (%)"].sum().reset_index()
+    category_sums = grouped.groupby("Asset Class", observed=True)["Allocation (%)"].sum().reset_index()
     total_sum = category_sums["Allocation (%)"].sum()
 
     positions = grouped.copy()
-    positions["id"] = "P_" + positions["Ticker"]
-    positions["parent"] = "C_" + positions["Asset Class"]
+    positions["id"] = "P_" + positions["Ticker"].astype(str)
+    positions["parent"] = "C_" + positions["Asset Class"].astype(str)
 
     categories = category_sums.copy()
-    categories["id"] = "C_" + categories["Asset Class"]
+    categories["id"] = "C_" + categories["Asset Class"].astype(str)
     categories["parent"] = "Total"
 
-    labels = positions["Ticker"].tolist() + categories["Asset Class"].tolist() + ["Total"]
+    labels = positions["Ticker"].astype(str).tolist() + categories["Asset Class"].astype(str).tolist() + ["Total"]
     ids = positions["id"].tolist() + categories["id"].tolist() + ["Total"]
     parents = positions["parent"].tolist() + categories["parent"].tolist() + [""]
     values = positions["Allocation (%)"].tolist() + categories["Allocation (%)"].tolist() + [total_sum]
+    return {"labels": labels, "ids": ids, "parents": parents, "values": values}
+
+
+def render_allocation_chart(sunburst: Dict[str, list]) -> str:
     custom_colors = ['#c0d9e6', '#9ac1d6', '#74a9c6', '#4e91b6', '#136b93', '#105377', '#0c3c59', '#072533']
 
     fig = go.Figure(go.Sunburst(
-        labels=labels,
-        ids=ids,
-        parents=parents,
-        values=values,
+        labels=sunburst["labels"],
+        ids=sunburst["ids"],
+        parents=sunburst["parents"],
+        values=sunburst["values"],
         branchvalues="total",
         maxdepth=2,
         insidetextorientation='radial',
@@ -274,14 +313,34 @@ def generate_allocation_chart(df: pd.DataFrame) -> str:
 
 
 
-def generate_all_charts(df: pd.DataFrame) -> Dict[str, str]:
+def warm_up() -> None:
+    """Import plotly's lazily loaded trace types and templates, e.g. in a fresh render worker."""
+    go.Figure([go.Scatter(), go.Bar(), go.Sunburst()], layout=dict(template="plotly_white")).to_html(
+        full_html=False, include_plotlyjs="cdn"
+    )
+
+
+# Chart file name -> (aggregate the shared inputs, build and serialise the figure)
+CHARTS = {
+    "performance.html": (performance_chart_data, render_performance_chart),
+    "top_positions.html": (top_positions_chart_data, render_top_positions_chart),
+    "drawdown.html": (drawdown_chart_data, render_drawdown_chart),
+    "allocation.html": (allocation_chart_data, render_allocation_chart),
+}
+
+
+def generate_all_charts(df: pd.DataFrame, executor: Optional[Executor] = None) -> Dict[str, str]:
     """
     Generates all four chart HTML strings in memory.
     Returns a dictionary mapping chart names to HTML content.
+    The data is validated and split into shared views once, up front, and
+    each chart aggregated in this process (vectorised, cheap). Building and
+    serialising the figures only needs the small aggregates, so with an
+    `executor` (e.g. a process pool) the four renders run concurrently.
     """
-    return {
-        "performance.html": generate_performance_chart(df),
-        "top_positions.html": generate_top_positions_chart(df),
-        "drawdown.html": generate_drawdown_chart(df),
-        "allocation.html": generate_allocation_chart(df),
-    }
\ No newline at end of file
+    inputs = prepare_chart_inputs(df)
+    aggregates = {name: aggregate(inputs) for name, (aggregate, _) in CHARTS.items()}
+    if executor is None:
+        return {name: CHARTS[name][1](aggregate) for name, aggregate in aggregates.items()}
+    futures = {name: executor.submit(CHARTS[name][1], aggregate) for name, aggregate in aggregates.items()}
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,253 @@
+# datasets.py
+#
+# Resolve the dataset behind a generate_dashboard call: a file under the
+# configured data root, the content hash of a dataset seen before, or
+# (for small inputs) the CSV text itself. Parsed frames are normalised once
+# and kept in a size-bounded LRU keyed by content hash; new datasets are
+# also spilled to the store directory, so hash references and restarts
+# skip CSV parsing.
+
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from .config import get_visualization_config
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow is optional; pandas' own parsers are used without it
+    pa = None
+    pa_csv = None
+
+logger = logging.getLogger("visualization.datasets")
+
+SUPPORTED_SUFFIXES = (".csv", ".parquet", ".feather", ".arrow")
+HASH_PATTERN = re.compile(r"^[0-9a-f]{12,64}$")
+CATEGORICAL_COLUMNS = ("Ticker", "Sector", "Asset Class")
+
+
+def _data_root() -> Path:
+    return get_visualization_config().datasets.data_root.resolve()
+
+
+def _store_dir() -> Path:
+    return get_visualization_config().datasets.resolved_store_dir()
+
+
+def resolve_data_path(path: str) -> Path:
+    """`path` (absolute or relative to the data root), refused if it leaves the data root."""
+    root = _data_root()
+    candidate = Path(path).expanduser()
+    resolved = (candidate if candidate.is_absolute() else root / candidate).resolve()
+    if not resolved.is_relative_to(root):
+        raise ValueError(f"'{path}' is outside the data directory {root}")
+    if resolved.suffix.lower() not in SUPPORTED_SUFFIXES:
+        raise ValueError(f"Unsupported file type '{resolved.suffix}'; expected one of {', '.join(SUPPORTED_SUFFIXES)}")
+    if not resolved.is_file():
+        raise FileNotFoundError(f"No such file under {root}: '{path}'")
+    return resolved
+
+
+def file_digest(path: Path) -> str:
+    stat = path.stat()
+    return _file_digest(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _file_digest(path: str, size: int, mtime_ns: int) -> str:
+    # Keyed by size and mtime too, so an unchanged file is hashed only once per process
+    with open(path, "rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest()
+
+
+def find_stored_dataset(digest: str) -> Optional[Path]:
+    """The stored file for a full hash or a unique prefix of at least 12 characters."""
+    digest = digest.strip().lower()
+    if not HASH_PATTERN.match(digest):
+        raise ValueError(f"'{digest}' is not a dataset hash")
+    store = _store_dir()
+    if len(digest) == 64:
+        return next((p for p in (store / f"{digest}.parquet", store / f"{digest}.csv") if p.is_file()), None)
+    if not store.is_dir():
+        return None
+    matches = sorted(p for p in store.iterdir() if p.name.startswith(digest) and p.suffix in (".parquet", ".csv"))
+    if len({p.stem for p in matches}) > 1:
+        raise ValueError(f"Dataset hash prefix '{digest}' is ambiguous; give more characters")
+    # Prefer the Parquet copy when both exist
+    return next((p for p in matches if p.suffix == ".parquet"), matches[0] if matches else None)
+
+
+def read_table(path: Path) -> pd.DataFrame:
+    """Read a CSV, Parquet or Feather file, memory-mapped and through Arrow when pyarrow is installed."""
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        return pd.read_parquet(path, memory_map=True)
+    if suffix in (".feather", ".arrow"):
+        return pd.read_feather(path, memory_map=True)
+    if pa_csv is not None:
+        with pa.memory_map(str(path)) as source:
+            return pa_csv.read_csv(source).to_pandas(date_as_object=False)
+    return pd.read_csv(path, memory_map=True)
+
+
+def _read_csv_bytes(raw: bytes) -> pd.DataFrame:
+    if pa_csv is not None:
+        return pa_csv.read_csv(pa.py_buffer(raw)).to_pandas(date_as_object=False)
+    return pd.read_csv(io.BytesIO(raw))
+
+
+def _write_atomic(path: Path, write) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def store_dataset(digest: str, df: pd.DataFrame, raw_csv: Optional[bytes] = None,
+                  source_csv: Optional[Path] = None) -> None:
+    """
+    Keep `df` under its hash: as Parquet when pyarrow is available, else as
+    CSV. Failures are logged only; the dataset just cannot be reused by hash.
+    """
+    store = _store_dir()
+    try:
+        if pa is not None:
+            _write_atomic(store / f"{digest}.parquet", lambda p: df.to_parquet(p, index=False))
+        elif raw_csv is not None:
+            _write_atomic(store / f"{digest}.csv", lambda p: p.write_bytes(raw_csv))
+        elif source_csv is not None:
+            _write_atomic(store / f"{digest}.csv", lambda p: shutil.copyfile(source_csv, p))
+        else:
+            _write_atomic(store / f"{digest}.csv", lambda p: df.to_csv(p, index=False))
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning("Could not store dataset %s: %s", digest, e)
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Strip column names, parse `Date` and make the label columns categorical (in place)."""
+    df.columns = df.columns.str.strip()
+    if "Date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = pd.to_datetime(df["Date"])
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    return df
+
+
+# === In-process frame cache ===
+class FrameCache:
+    """LRU of normalised DataFrames keyed by content hash, bounded by entries and memory."""
+
+    def __init__(self, max_entries: int = 8, max_bytes: int = 512 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()  # digest -> (frame, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._frames.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, digest: str, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if digest in self._frames:
+                self._bytes -= self._frames.pop(digest)[1]
+            self._frames[digest] = (df, size)
+            self._bytes += size
+            while len(self._frames) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._frames.popitem(last=False)
+                self._bytes -= evicted
+
+    def match(self, prefix: str) -> list:
+        with self._lock:
+            return [digest for digest in self._frames if digest.startswith(prefix)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._frames), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+_dataset_config = get_visualization_config().datasets
+frame_cache = FrameCache(_dataset_config.cache_max_entries, _dataset_config.cache_max_mb * 2**20)
+
+
+def _cached_frame(digest: str, parse=None, **store_kwargs) -> pd.DataFrame:
+    """The normalised frame for `digest`: from the cache, the store, or `parse()` as a last resort."""
+    df = frame_cache.get(digest)
+    if df is not None:
+        return df
+    stored = find_stored_dataset(digest)
+    if stored is not None:
+        df = normalize_frame(read_table(stored))
+    elif parse is not None:
+        df = normalize_frame(parse())
+        if get_visualization_config().datasets.spill_to_disk:
+            store_dataset(digest, df, **store_kwargs)
+    else:
+        raise FileNotFoundError(f"No stored dataset with hash '{digest}'; pass it by 'path' first")
+    frame_cache.put(digest, df)
+    return df
+
+
+def _resolve_digest(prefix: str) -> str:
+    prefix = prefix.strip().lower()
+    if not HASH_PATTERN.match(prefix):
+        raise ValueError(f"'{prefix}' is not a dataset hash")
+    cached = frame_cache.match(prefix)
+    if len(cached) > 1:
+        raise ValueError(f"Dataset hash prefix '{prefix}' is ambiguous; give more characters")
+    if cached:
+        return cached[0]
+    stored = find_stored_dataset(prefix)
+    if stored is None:
+        raise FileNotFoundError(f"No stored dataset with hash '{prefix}'; pass it by 'path' first")
+    return stored.stem
+
+
+def load_dataset(data: str = "", path: str = "", dataset: str = "") -> Tuple[pd.DataFrame, str]:
+    """
+    Load the normalised DataFrame for exactly one of `path`, `dataset`
+    (content hash) or `data` (inline CSV text). Returns the frame and its
+    content hash. The frame is shared through `frame_cache`; treat it as
+    read-only.
+    """
+    given = [name for name, value in (("data", data), ("path", path), ("dataset", dataset)) if value and value.strip()]
+    if len(given) != 1:
+        raise ValueError("Provide exactly one of 'path', 'dataset' or 'data'")
+
+    if dataset:
+        digest = _resolve_digest(dataset)
+        return _cached_frame(digest), digest
+
+    if path:
+        source = resolve_data_path(path)
+        digest = file_digest(source)
+        source_csv = source if source.suffix.lower() == ".csv" else None
+        return _cached_frame(digest, lambda: read_table(source), source_csv=source_csv), digest
+
+    raw = data.encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    return _cached_frame(digest, lambda: _read_csv_bytes(raw), raw_csv=raw), digest
@@ -0,0 +1,49 @@
+# portfolio_analytics.py
+#
+# Vectorised portfolio aggregations shared by the dashboard charts (and
+# usable by other tools): every function is a grouped sum/mean over whole
+# columns, never a Python callback per group.
+
+from typing import Union
+
+import pandas as pd
+
+GroupKey = Union[str, pd.Series]
+
+
+def weighted_mean(df: pd.DataFrame, value: str, weight: str, by: GroupKey = "Date") -> pd.Series:
+    """
+    sum(value * weight) / sum(weight) per group of `by`, sorted by group.
+
+    Missing values are skipped in both sums, as Series.sum() does, and a
+    group whose weights sum to zero gets NaN.
+    """
+    keys = df[by] if isinstance(by, str) else by
+    weights = df[weight]
+    sums = pd.DataFrame({"weighted": df[value] * weights, "weight": weights}).groupby(keys, observed=True).sum()
+    return sums["weighted"] / sums["weight"].where(sums["weight"] != 0)
+
+
+def weighted_performance(df: pd.DataFrame, by: GroupKey = "Date") -> pd.Series:
+    """Weight-averaged 'Performance (%)' per date (or other grouping), named 'Weighted_Performance'."""
+    return weighted_mean(df, "Performance (%)", "Weight (%)", by).rename("Weighted_Performance")
+
+
+def benchmark_performance(benchmark: pd.DataFrame, by: GroupKey = "Date") -> pd.Series:
+    """Mean 'Performance (%)' of the benchmark rows per date, named 'Performance_Benchmark'."""
+    keys = benchmark[by] if isinstance(by, str) else by
+    return benchmark["Performance (%)"].groupby(keys, observed=True).mean().rename("Performance_Benchmark")
+
+
+def performance_vs_benchmark(portfolio: pd.DataFrame, benchmark: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per Date with Weighted_Performance, Performance_Benchmark and
+    their Difference (outer join on Date, sorted).
+    """
+    merged = pd.concat(
+        [weighted_performance(portfolio), benchmark_performance(benchmark)], axis=1, join="outer"
+    ).sort_index()
+    merged.index.name = "Date"
+    merged = merged.reset_index()
+    merged["Difference"] = merged["Weighted_Performance"] - merged["Performance_Benchmark"]
+    return merged